@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import glob
+import tempfile
+
+import numpy as np
+
+from estrutura import Instancia
+
+# Cada coleção (diretório de JSONs) ganha um subdiretório com:
+#   tipos.npy   -> array (total de tipos, 3) com largura, altura e demanda de
+#                  todos os tipos de todas as instâncias, concatenados;
+#   indice.json -> para cada arquivo, o intervalo [inicio, fim) de suas linhas
+#                  em tipos.npy, as dimensões do container e o mtime/tamanho do
+#                  JSON de origem usados para invalidar o cache.
+DIRETORIO_CACHE = ".cache"
+ARQUIVO_TIPOS = "tipos.npy"
+ARQUIVO_INDICE = "indice.json"
+VERSAO_CACHE = 1
+
+# Coleções já abertas neste processo: diretório -> (índice, tipos mapeados em memória)
+_colecoes_abertas = {}
+
+def _assinatura(caminho):
+    st = os.stat(caminho)
+    return [st.st_mtime_ns, st.st_size]
+
+def _gravar_atomico(caminho, gravar):
+    fd, caminho_tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            gravar(f)
+        os.replace(caminho_tmp, caminho)
+    except BaseException:
+        if os.path.exists(caminho_tmp):
+            os.remove(caminho_tmp)
+        raise
+
+def converter_colecao(diretorio):
+    """
+    Converte todos os JSONs de `diretorio` para o formato binário da coleção.
+    O índice é gravado por último, de modo que um cache incompleto nunca é lido.
+    """
+    arquivos = sorted(glob.glob(os.path.join(diretorio, "*.json")))
+    linhas = []
+    indice = {"versao": VERSAO_CACHE, "instancias": {}}
+    for caminho in arquivos:
+        assinatura = _assinatura(caminho)
+        with open(caminho, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        container_info = data["Objects"][0]
+        inicio = len(linhas)
+        for item_tipo in data["Items"]:
+            linhas.append((item_tipo["Length"], item_tipo["Height"], item_tipo.get("Demand", 1)))
+        indice["instancias"][os.path.basename(caminho)] = {
+            "nome": data.get("Name", caminho),
+            "largura": container_info["Length"],
+            "altura": container_info["Height"],
+            "inicio": inicio,
+            "fim": len(linhas),
+            "assinatura": assinatura,
+        }
+
+    tipos = np.array(linhas).reshape(-1, 3)
+    destino = os.path.join(diretorio, DIRETORIO_CACHE)
+    os.makedirs(destino, exist_ok=True)
+    _gravar_atomico(os.path.join(destino, ARQUIVO_TIPOS), lambda f: np.save(f, tipos))
+    _gravar_atomico(os.path.join(destino, ARQUIVO_INDICE),
+                    lambda f: f.write(json.dumps(indice).encode("utf-8")))
+    _colecoes_abertas.pop(os.path.abspath(diretorio), None)
+    print(f"Coleção '{diretorio}' convertida: {len(arquivos)} instâncias, {len(tipos)} tipos de item.")
+
+def _abrir_colecao(diretorio):
+    chave = os.path.abspath(diretorio)
+    if chave not in _colecoes_abertas:
+        destino = os.path.join(diretorio, DIRETORIO_CACHE)
+        with open(os.path.join(destino, ARQUIVO_INDICE), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+        if indice.get("versao") != VERSAO_CACHE:
+            raise ValueError("versão de cache diferente")
+        tipos = np.load(os.path.join(destino, ARQUIVO_TIPOS), mmap_mode="r")
+        _colecoes_abertas[chave] = (indice, tipos)
+    return _colecoes_abertas[chave]
+
+def _entrada_valida(diretorio, nome_arquivo, caminho_json):
+    try:
+        indice, tipos = _abrir_colecao(diretorio)
+    except (OSError, ValueError):
+        return None
+    entrada = indice["instancias"].get(nome_arquivo)
+    if entrada is None or entrada["assinatura"] != _assinatura(caminho_json):
+        return None
+    return entrada, tipos
+
+def preparar_colecao(diretorio):
+    """
+    Converte a coleção se o cache não existe ou algum JSON mudou desde a
+    conversão. Chamada antes de abrir vários processos, evita que cada um
+    converta a mesma coleção ao mesmo tempo.
+    """
+    for caminho in sorted(glob.glob(os.path.join(diretorio, "*.json"))):
+        if _entrada_valida(diretorio, os.path.basename(caminho), caminho) is None:
+            converter_colecao(diretorio)
+            return
+
+def carregar_instancia_cache(caminho_json):
+    """
+    Carrega uma instância pelo cache binário da sua coleção. Se o cache não
+    existe ou o JSON mudou desde a conversão, a coleção é convertida de novo.
+    Os arrays da instância são fatias do arquivo mapeado em memória, sem cópia.
+    """
+    diretorio = os.path.dirname(caminho_json) or "."
+    nome_arquivo = os.path.basename(caminho_json)
+
+    encontrado = _entrada_valida(diretorio, nome_arquivo, caminho_json)
+    if encontrado is None:
+        converter_colecao(diretorio)
+        encontrado = _entrada_valida(diretorio, nome_arquivo, caminho_json)
+        if encontrado is None:
+            raise FileNotFoundError(caminho_json)
+    entrada, tipos = encontrado
+
+    bloco = tipos[entrada["inicio"]:entrada["fim"]]
+    return Instancia(entrada["nome"], entrada["largura"], entrada["altura"],
+                     bloco[:, 0], bloco[:, 1], bloco[:, 2])
+
+if __name__ == "__main__":
+    # Conversão única: sem argumentos, todas as coleções de data/ e o diretório in/.
+    colecoes = sys.argv[1:] or sorted(glob.glob("data/*/json") + glob.glob("data/*/JSON")) + ["in"]
+    for colecao in colecoes:
+        converter_colecao(colecao)
@@ -0,0 +1,90 @@
+import weakref
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Número de conjuntos de itens guardados antes de descartar os menos usados.
+TAMANHO_CACHE_VIABILIDADE = 4096
+
+def chave_itens(itens):
+    """
+    Forma canônica do multiconjunto de dimensões (largura, altura) dos itens.
+    Itens de mesmas dimensões são intercambiáveis, então conjuntos com os
+    mesmos tipos têm a mesma chave independentemente dos ids e da ordem.
+    """
+    return tuple(sorted((item.largura, item.altura) for item in itens))
+
+def chave_com_item(chave, item):
+    """Chave do multiconjunto `chave` acrescido de `item`, sem reordenar tudo."""
+    dimensao = (item.largura, item.altura)
+    k = bisect_left(chave, dimensao)
+    return chave[:k] + (dimensao,) + chave[k:]
+
+def arranjo_canonico(container, itens):
+    """
+    Reempacota `itens` do zero em um container vazio do mesmo tipo e das
+    mesmas dimensões de `container`, em ordem decrescente de (altura,
+    largura) como no FFF. Retorna o arranjo obtido, ou None se algum item
+    não couber.
+    """
+    vazio = type(container)(0, container.largura_max, container.altura_max)
+    for item in sorted(itens, key=lambda item: (item.altura, item.largura), reverse=True):
+        if not vazio.tentar_empacotar_item(item):
+            return None
+    return vazio.arranjo()
+
+class CacheViabilidade:
+    """
+    Cache LRU da pergunta "estes itens cabem juntos em um container?".
+    Para cada multiconjunto de dimensões guarda o resultado do
+    reempacotamento canônico: o arranjo encontrado ou None se ele falhou.
+    Conta acertos e falhas para o relatório da execução.
+    """
+    def __init__(self, capacidade=TAMANHO_CACHE_VIABILIDADE):
+        self.capacidade = capacidade
+        self._entradas = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        # Para cada container, enquanto a versão dele não muda: a chave do seu
+        # conteúdo e as respostas já dadas por dimensão do item acrescentado.
+        # Containers descartados saem sozinhos.
+        self._por_container = weakref.WeakKeyDictionary()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def arranjo_com_item(self, container, item, listar_itens):
+        """
+        Arranjo canônico do conteúdo de `container` mais `item`, ou None se
+        eles não couberem juntos. `listar_itens(container)` só é chamada
+        quando o container mudou desde a última consulta ou quando o arranjo
+        precisa ser calculado.
+        """
+        versao, chave_container, respostas = self._por_container.get(container, (None, None, None))
+        if versao != container.versao:
+            chave_container = chave_itens(listar_itens(container))
+            respostas = {}
+            self._por_container[container] = (container.versao, chave_container, respostas)
+
+        dimensao = (item.largura, item.altura)
+        if dimensao in respostas:
+            self.acertos += 1
+            return respostas[dimensao]
+
+        chave = chave_com_item(chave_container, item)
+        if chave in self._entradas:
+            self.acertos += 1
+            self._entradas.move_to_end(chave)
+            arranjo = self._entradas[chave]
+        else:
+            self.falhas += 1
+            arranjo = arranjo_canonico(container, listar_itens(container) + [item])
+            if self.capacidade > 0:
+                self._entradas[chave] = arranjo
+                if len(self._entradas) > self.capacidade:
+                    self._entradas.popitem(last=False)
+        respostas[dimensao] = arranjo
+        return arranjo
+
+    def taxa_acerto(self):
+        consultas = self.acertos + self.falhas
+        return self.acertos / consultas if consultas else 0.0
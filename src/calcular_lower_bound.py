@@ -1,6 +1,9 @@
 import math
 import csv
 import sys
+
+import numpy as np
+
 from carrega_json import carregar_instancia_json
 
 def calcular_lower_bound(l_container, a_container, itens):
@@ -16,6 +19,86 @@ def calcular_lower_bound(l_container, a_container, itens):
     
     return math.ceil(area_total_itens / area_bin)
 
+def _divisao_teto(a, b):
+    return -(-a // b)
+
+def _candidatos_limiar(tamanhos, capacidade):
+    """
+    Limiares p (1 <= p <= C/2) que precisam ser testados: entre dois tamanhos
+    de item consecutivos o conjunto dos itens com tamanho >= p não muda e o
+    maior p do intervalo domina os demais.
+    """
+    metade = capacidade // 2
+    if metade < 1:
+        return np.array([], dtype=np.int64)
+    return np.union1d(tamanhos[tamanhos <= metade], [metade])
+
+def _limite_uma_dimensao(tamanhos, capacidade):
+    """
+    Limite de Martello e Vigo (1998) na direção de `capacidade` para itens que
+    não podem ser empilhados na outra direção (a outra dimensão passa da metade).
+    Vetorizado sobre todos os limiares p ao mesmo tempo.
+    """
+    tamanhos = np.asarray(tamanhos, dtype=np.int64)
+    base = int(np.sum(2 * tamanhos > capacidade))
+    candidatos = _candidatos_limiar(tamanhos, capacidade)
+    if len(tamanhos) == 0 or len(candidatos) == 0:
+        return base
+
+    p = candidatos[:, None]
+    t = tamanhos[None, :]
+    j1 = t > capacidade - p
+    j2 = ~j1 & (2 * t > capacidade)
+    j3 = (2 * t <= capacidade) & (t >= p)
+
+    folga_j2 = j2.sum(axis=1) * capacidade - (t * j2).sum(axis=1)
+    termo_area = _divisao_teto((t * j3).sum(axis=1) - folga_j2, capacidade)
+    cabem_j2 = (((capacidade - t) // p) * j2).sum(axis=1)
+    termo_contagem = _divisao_teto(j3.sum(axis=1) - cabem_j2, capacidade // candidatos)
+
+    limites = (j1 | j2).sum(axis=1) + np.maximum(0, np.maximum(termo_area, termo_contagem))
+    return max(base, int(limites.max()))
+
+def _limite_l2(l_container, a_container, larguras, alturas):
+    """
+    Limite L2 de Martello e Vigo (1998). Para cada par de limiares (p, q):
+    K1 = itens com l > L - p e a > A - q, K2 = demais itens grandes nas duas
+    dimensões e K3 = demais itens com l >= p e a >= q. Itens de K1 e K2 exigem
+    um bin cada, nenhum item de K3 divide bin com K1, e a área de K3 que não
+    cabe na sobra dos bins de K2 exige bins novos.
+    """
+    area_bin = l_container * a_container
+    areas = larguras * alturas
+    grandes = (2 * larguras > l_container) & (2 * alturas > a_container)
+    qs = _candidatos_limiar(alturas, a_container)[:, None]
+    melhor = int(grandes.sum())
+    if len(qs) == 0:
+        return melhor
+
+    for p in _candidatos_limiar(larguras, l_container):
+        k1 = (larguras > l_container - p) & (alturas[None, :] > a_container - qs)
+        k2 = grandes & ~k1
+        k3 = ~k1 & ~k2 & (larguras >= p) & (alturas[None, :] >= qs)
+        excesso = (areas * (k2 | k3)).sum(axis=1) - k2.sum(axis=1) * area_bin
+        limites = (k1 | k2).sum(axis=1) + np.maximum(0, _divisao_teto(excesso, area_bin))
+        melhor = max(melhor, int(limites.max()))
+    return melhor
+
+def calcular_lower_bound_mv(l_container, a_container, itens):
+    """
+    Limite inferior de Martello e Vigo: o maior entre o limite de área (L1),
+    os limites por largura e por altura e o limite L2 sobre os pares de limiares.
+    """
+    if not itens:
+        return 0
+    larguras = np.array([item.largura for item in itens], dtype=np.int64)
+    alturas = np.array([item.altura for item in itens], dtype=np.int64)
+
+    return max(calcular_lower_bound(l_container, a_container, itens),
+               _limite_uma_dimensao(larguras[2 * alturas > a_container], l_container),
+               _limite_uma_dimensao(alturas[2 * larguras > l_container], a_container),
+               _limite_l2(l_container, a_container, larguras, alturas))
+
 def inicializar_csv(nome_arquivo, cabecalho):
     """Cria o arquivo CSV e escreve o cabeçalho."""
     try:
@@ -46,7 +129,7 @@ if __name__ == "__main__":
     ]
     
     ARQUIVO_CSV_SAIDA = "results/resultados_lower_bound.csv"
-    CABECALHO = ["Instancia", "Lower_Bound_Area(L1)"]
+    CABECALHO = ["Instancia", "Lower_Bound_Area(L1)", "Lower_Bound_MV(L2)"]
 
     inicializar_csv(ARQUIVO_CSV_SAIDA, CABECALHO)
 
@@ -56,8 +139,9 @@ if __name__ == "__main__":
         if dados:
             l_cont, a_cont, max_cont, itens = dados
             lb = calcular_lower_bound(l_cont, a_cont, itens)
+            lb_mv = calcular_lower_bound_mv(l_cont, a_cont, itens)
             
-            salvar_linha_csv(ARQUIVO_CSV_SAIDA, [nome_arquivo, lb])
+            salvar_linha_csv(ARQUIVO_CSV_SAIDA, [nome_arquivo, lb, lb_mv])
         else:
             print(f"  -> ERRO ao carregar {nome_arquivo}.")
             salvar_linha_csv(ARQUIVO_CSV_SAIDA, [nome_arquivo, "Erro_Carregamento"])
\ No newline at end of file
@@ -1,9 +1,18 @@
 import json
 import sys
-from estrutura import Retangulo 
+from estrutura import Instancia
+from cache_instancias import carregar_instancia_cache
 
-def carregar_instancia_json(nome_arquivo):
+def carregar_instancia(nome_arquivo, usar_cache=False):
+    """
+    Lê o JSON e devolve a instância compacta (tipos de item com multiplicidade),
+    sem criar um objeto por unidade demandada. Com `usar_cache`, lê do cache
+    binário da coleção (ver cache_instancias), criado ou refeito se preciso.
+    """
     try:
+        if usar_cache:
+            return carregar_instancia_cache(nome_arquivo)
+
         with open(nome_arquivo, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
@@ -15,30 +24,15 @@ def carregar_instancia_json(nome_arquivo):
         l_container = container_info['Length']
         a_container = container_info['Height']
         
-        max_containers = sys.maxsize 
-        
-        itens = []
-        item_id_counter = 1
         if not data.get('Items'):
             print("Erro: JSON não contém a chave 'Items'.")
             sys.exit(1)
             
-        for item_tipo in data['Items']:
-            l_item = item_tipo['Length']
-            a_item = item_tipo['Height']
-            demanda = item_tipo.get('Demand', 1) 
-            
-            for _ in range(demanda):
-                itens.append(Retangulo(id=item_id_counter, 
-                                       largura=l_item, 
-                                       altura=a_item))
-                item_id_counter += 1
-        
-        print(f"Instância '{data.get('Name', nome_arquivo)}' carregada com sucesso.")
-        print(f"Dimensões do Container: {l_container}x{a_container}")
-        print(f"Total de Itens (considerando a demanda): {len(itens)}")
+        larguras = [item_tipo['Length'] for item_tipo in data['Items']]
+        alturas = [item_tipo['Height'] for item_tipo in data['Items']]
+        demandas = [item_tipo.get('Demand', 1) for item_tipo in data['Items']]
         
-        return l_container, a_container, max_containers, itens
+        return Instancia(data.get('Name', nome_arquivo), l_container, a_container, larguras, alturas, demandas)
 
     except FileNotFoundError:
         print(f"Erro: Arquivo '{nome_arquivo}' não encontrado.")
@@ -48,4 +42,15 @@ def carregar_instancia_json(nome_arquivo):
         sys.exit(1)
     except Exception as e:
         print(f"Erro ao ler o arquivo JSON: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+def carregar_instancia_json(nome_arquivo, usar_cache=False):
+    instancia = carregar_instancia(nome_arquivo, usar_cache)
+    itens = instancia.expandir_itens()
+    max_containers = sys.maxsize 
+
+    print(f"Instância '{instancia.nome}' carregada com sucesso.")
+    print(f"Dimensões do Container: {instancia.largura_container}x{instancia.altura_container}")
+    print(f"Total de Itens (considerando a demanda): {len(itens)}")
+
+    return instancia.largura_container, instancia.altura_container, max_containers, itens
\ No newline at end of file
@@ -1,12 +1,59 @@
+import numpy as np
+
 class Retangulo:
     """
     Classe para representar um item retangular.
     Armazena suas dimensões e um ID para rastreamento.
+    Usa __slots__: instâncias com milhares de itens não carregam um __dict__ por item.
     """
-    def __init__(self, id, largura, altura):
+    __slots__ = ("id", "largura", "altura", "tipo")
+
+    def __init__(self, id, largura, altura, tipo=None):
         self.id = id
         self.largura = largura
         self.altura = altura
+        self.tipo = tipo
+
+    def __repr__(self):
+        return f"Ret(id={self.id}, l={self.largura}, a={self.altura})"
+
+class Instancia:
+    """
+    Instância do 2D-BPP representada por tipos de item em arrays NumPy.
+    Cada tipo aparece uma vez, com sua demanda guardada como multiplicidade,
+    em vez de um objeto por unidade demandada.
+    """
+    def __init__(self, nome, largura_container, altura_container, larguras, alturas, multiplicidades):
+        self.nome = nome
+        self.largura_container = largura_container
+        self.altura_container = altura_container
+        self.larguras = np.asarray(larguras)
+        self.alturas = np.asarray(alturas)
+        self.multiplicidades = np.asarray(multiplicidades, dtype=np.int64)
+        self.tipos = np.arange(len(self.larguras))
+
+    @property
+    def num_tipos(self):
+        return len(self.tipos)
+
+    @property
+    def num_itens(self):
+        return int(self.multiplicidades.sum())
+
+    def expandir_itens(self):
+        """
+        Gera um Retangulo por unidade demandada, com IDs 1..n na ordem dos tipos,
+        para as heurísticas que trabalham item a item.
+        """
+        itens = []
+        item_id = 1
+        for tipo, largura, altura, multiplicidade in zip(self.tipos.tolist(), self.larguras.tolist(),
+                                                         self.alturas.tolist(), self.multiplicidades.tolist()):
+            for _ in range(multiplicidade):
+                itens.append(Retangulo(item_id, largura, altura, tipo))
+                item_id += 1
+        return itens
 
     def __repr__(self):
-        return f"Ret(id={self.id}, l={self.largura}, a={self.altura})"
\ No newline at end of file
+        return (f"Instancia(nome={self.nome}, container={self.largura_container}x{self.altura_container}, "
+                f"tipos={self.num_tipos}, itens={self.num_itens})")
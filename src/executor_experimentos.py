@@ -0,0 +1,169 @@
+import os
+import csv
+import json
+import time
+import tempfile
+import multiprocessing as mp
+
+from carrega_json import carregar_instancia_json
+from cache_instancias import preparar_colecao
+from heuristica_fff import heuristica_fff
+from heuristica_hff import heuristica_hff
+from grasp import GRASP
+
+CABECALHO_HEURISTICAS = ["Instancia", "Metodo", "Bins", "Tempo(s)"]
+CABECALHO_GRASP = ["Instancia", "Construcao", "Busca", "Seed", "Bins", "Tempo(s)", "Tempo(s) da melhor solução", "Iteracoes_Totais"]
+
+ESTRATEGIAS_GRASP = [
+    ("fff", "first_improving"), ("fff", "best_improving"),
+    ("hff", "first_improving"), ("hff", "best_improving")
+]
+
+def expandir_grade(instancias, sementes, estrategias=ESTRATEGIAS_GRASP):
+    """
+    Gera as tarefas (instância x método x semente) do experimento, na ordem
+    em que as linhas aparecem nos CSVs. Heurísticas determinísticas não
+    dependem da semente e entram uma vez por instância.
+    """
+    tarefas = []
+    for instancia in instancias:
+        tarefas.append({"instancia": instancia, "metodo": "FFF"})
+        tarefas.append({"instancia": instancia, "metodo": "HFF"})
+        for semente in sementes:
+            for construcao, busca in estrategias:
+                tarefas.append({"instancia": instancia, "metodo": "GRASP",
+                                "construcao": construcao, "busca": busca, "semente": semente})
+    return tarefas
+
+def chave_tarefa(tarefa):
+    """Nome de arquivo único e estável para o resultado de uma tarefa."""
+    nome = os.path.splitext(os.path.basename(tarefa["instancia"]))[0]
+    if tarefa["metodo"] != "GRASP":
+        return f"{nome}__{tarefa['metodo']}"
+    return f"{nome}__GRASP_{tarefa['construcao']}_{tarefa['busca']}__{tarefa['semente']}"
+
+def salvar_json_atomico(caminho, dados):
+    """
+    Grava em um arquivo temporário no mesmo diretório e renomeia: o resultado
+    ou está completo no disco ou não existe, mesmo com o processo interrompido.
+    """
+    diretorio = os.path.dirname(caminho) or "."
+    fd, caminho_tmp = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(caminho_tmp, caminho)
+    except BaseException:
+        if os.path.exists(caminho_tmp):
+            os.remove(caminho_tmp)
+        raise
+
+def _instancia_viavel(l_c, a_c, itens):
+    return all(item.largura <= l_c and item.altura <= a_c for item in itens)
+
+def executar_tarefa(tarefa, iteracoes_max, tempo_max, alpha, threads=1):
+    """
+    Executa uma tarefa da grade e devolve seu resultado como dicionário.
+    `threads` limita os workers do CP-SAT no reparo da LNS do GRASP.
+    """
+    l_c, a_c, max_c, itens = carregar_instancia_json(tarefa["instancia"], usar_cache=True)
+    resultado = dict(tarefa)
+
+    # Com algum item maior que o container o HFF e o GRASP não terminam;
+    # como no laço original, só o FFF registra a instância como inviável.
+    if not _instancia_viavel(l_c, a_c, itens):
+        resultado["inviavel"] = True
+        resultado["bins"] = "INVIÁVEL"
+        resultado["tempo"] = 0.0
+        return resultado
+    resultado["inviavel"] = False
+
+    start = time.time()
+    if tarefa["metodo"] == "FFF":
+        resultado["bins"] = len(heuristica_fff(l_c, a_c, max_c, itens))
+        resultado["tempo"] = time.time() - start
+    elif tarefa["metodo"] == "HFF":
+        resultado["bins"] = len(heuristica_hff(l_c, a_c, max_c, itens))
+        resultado["tempo"] = time.time() - start
+    else:
+        grasp = GRASP(iteracoes_max, tempo_max, tarefa["construcao"], tarefa["busca"], alpha, tarefa["semente"],
+                      parar_no_limite_inferior=True, threads_reparo_lns=threads)
+        melhor_sol, iteracoes, tempo_melhor_solucao = grasp.executar(tarefa["instancia"], usar_cache=True)
+        resultado["bins"] = len(melhor_sol) if melhor_sol else "N/A"
+        resultado["tempo"] = time.time() - grasp.tempo_inicio
+        resultado["tempo_melhor_solucao"] = tempo_melhor_solucao
+        resultado["iteracoes"] = iteracoes
+        resultado["iteracoes_repetidas"] = grasp.iteracoes_repetidas
+    return resultado
+
+def _executar_e_salvar(argumentos):
+    tarefa, diretorio, iteracoes_max, tempo_max, alpha, threads = argumentos
+    resultado = executar_tarefa(tarefa, iteracoes_max, tempo_max, alpha, threads)
+    salvar_json_atomico(os.path.join(diretorio, chave_tarefa(tarefa) + ".json"), resultado)
+    return resultado
+
+def tarefas_pendentes(tarefas, diretorio):
+    """Tarefas cujo resultado ainda não foi gravado em `diretorio`."""
+    return [t for t in tarefas
+            if not os.path.exists(os.path.join(diretorio, chave_tarefa(t) + ".json"))]
+
+def executar_grade(tarefas, diretorio, iteracoes_max, tempo_max, alpha, workers=None):
+    """
+    Executa as tarefas pendentes em um pool de processos. Cada resultado é
+    gravado assim que termina, então uma nova chamada após uma queda retoma
+    de onde parou.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    pendentes = tarefas_pendentes(tarefas, diretorio)
+    workers = workers or os.cpu_count() or 1
+    print(f"{len(tarefas) - len(pendentes)} tarefas já concluídas, {len(pendentes)} pendentes, {workers} processos.")
+    if not pendentes:
+        return
+
+    # Com o cache frio, cada processo converteria a mesma coleção ao mesmo
+    # tempo; a conversão é feita uma vez aqui, antes de abrir o pool.
+    for colecao in sorted({os.path.dirname(t["instancia"]) or "." for t in pendentes}):
+        preparar_colecao(colecao)
+
+    # Cada processo do pool fica com sua parte dos núcleos para o CP-SAT.
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    argumentos = [(t, diretorio, iteracoes_max, tempo_max, alpha, threads) for t in pendentes]
+    with mp.Pool(workers, maxtasksperchild=1) as pool:
+        for concluidas, resultado in enumerate(pool.imap_unordered(_executar_e_salvar, argumentos), 1):
+            print(f"  [{concluidas}/{len(pendentes)}] {chave_tarefa(resultado)}: {resultado['bins']} bins em {resultado['tempo']:.2f}s")
+
+def carregar_resultados(tarefas, diretorio):
+    """Lê os resultados gravados, na ordem das tarefas (as ausentes são ignoradas)."""
+    resultados = []
+    for tarefa in tarefas:
+        caminho = os.path.join(diretorio, chave_tarefa(tarefa) + ".json")
+        if os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                resultados.append(json.load(f))
+    return resultados
+
+def _escrever_csv_atomico(nome_arquivo, cabecalho, linhas):
+    diretorio = os.path.dirname(nome_arquivo) or "."
+    fd, caminho_tmp = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(cabecalho)
+        writer.writerows(linhas)
+    os.replace(caminho_tmp, nome_arquivo)
+
+def consolidar_csv(resultados, arq_heuristicas, arq_grasp):
+    """Reescreve os CSVs de heurísticas e de GRASP no formato de sempre."""
+    linhas_heuristicas = []
+    linhas_grasp = []
+    for r in resultados:
+        if r["metodo"] != "GRASP":
+            if r["inviavel"] and r["metodo"] != "FFF":
+                continue
+            linhas_heuristicas.append([r["instancia"], r["metodo"], r["bins"], f"{r['tempo']:.4f}"])
+        elif not r["inviavel"]:
+            linhas_grasp.append([r["instancia"], r["construcao"].upper(), r["busca"], r["semente"], r["bins"],
+                                 f"{r['tempo']:.2f}", r["tempo_melhor_solucao"], r["iteracoes"]])
+    _escrever_csv_atomico(arq_heuristicas, CABECALHO_HEURISTICAS, linhas_heuristicas)
+    _escrever_csv_atomico(arq_grasp, CABECALHO_GRASP, linhas_grasp)
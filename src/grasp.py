@@ -1,42 +1,154 @@
-import copy
+import math
 import time
+import queue
 import random
+import threading
+import multiprocessing as mp
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import chain, combinations
+
+import numpy as np
 
 from carrega_json import carregar_instancia_json
-from heuristica_fff import ContainerFFF
-from heuristica_hff import ContainerHFF, Level
+from calcular_lower_bound import calcular_lower_bound_mv
+from cache_viabilidade import CacheViabilidade, TAMANHO_CACHE_VIABILIDADE
+from heuristica_fff import ContainerFFF, empacotar_first_fit, heuristica_fff
+from heuristica_hff import ContainerHFF, Level, heuristica_hff
+from indices import ArvoreMinimo, ArvoreContagem, IndiceContainers
+from pli import empacotar_exato
+from solucao import Solucao
+
+# Vizinhanças que podem seguir o shift na VND, da mais barata à mais cara.
+VIZINHANCAS_EXTRAS = ("swap", "swap21", "ejecao")
+
+# Intervalo (s) entre consultas ao cancelamento enquanto os processos rodam.
+INTERVALO_CANCELAMENTO = 0.1
+
+# Quantas soluções construídas (e o custo após a busca local) são lembradas.
+LIMITE_SOLUCOES_VISTAS = 10000
+
+# GRASP reativo: valores de alpha sorteados, iterações entre atualizações das
+# probabilidades e expoente que acentua as diferenças de qualidade.
+ALPHAS_REATIVOS = (0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5)
+PERIODO_REATIVO = 20
+EXPOENTE_REATIVO = 10
+
+# Tentativas seguidas sem conseguir tirar um container antes de a LNS passar
+# a destruir um container a mais.
+TENTATIVAS_LNS = 50
 
 class GRASP:
     """
     Classe que implementa a metaheurística GRASP.
     """
-    def __init__(self, iteracoes_max, tempo_max, estrategia_construcao="hff", estrategia_busca="best_improving", alpha=0.2, random_seed=42, limite_sem_melhora=10):
+    def __init__(self, iteracoes_max, tempo_max, estrategia_construcao="hff", estrategia_busca="best_improving", alpha=0.2, random_seed=42, limite_sem_melhora=10, workers=1, parar_no_limite_inferior=False, reempacotar=False, tamanho_cache_viabilidade=TAMANHO_CACHE_VIABILIDADE, tamanho_lote=1, fracao_refinamento=1.0, alpha_reativo=False, tamanho_elite=0, frequencia_relinking=20, incumbente_heuristica=False, lns_bins=0, tempo_reparo_lns=1.0, threads_reparo_lns=0):
         self.iteracoes_max = iteracoes_max
         self.tempo_max = tempo_max
         self.estrategia_construcao = estrategia_construcao.lower()
         self.estrategia_busca = estrategia_busca.lower()
 
-        random.seed(random_seed)
+        # "first_improving" ou "best_improving", seguido das vizinhanças extras
+        # da VND separadas por "+", por exemplo "best_improving+swap+ejecao".
+        tipo_busca, *extras = self.estrategia_busca.split("+")
+        desconhecidas = set(extras) - set(VIZINHANCAS_EXTRAS)
+        if desconhecidas:
+            raise ValueError(f"Vizinhança desconhecida: {', '.join(sorted(desconhecidas))}.")
+        self.tipo_busca = "first" if tipo_busca == "first_improving" else "best"
+        self.vizinhancas = ["shift"] + [v for v in VIZINHANCAS_EXTRAS if v in extras]
+        self.workers = workers
+
+        # Filtro de construções: cada lote de `tamanho_lote` construções é
+        # ordenado pelo custo e só a fração `fracao_refinamento` de melhores
+        # passa pela busca local, uma por iteração.
+        if tamanho_lote < 1:
+            raise ValueError("O tamanho do lote deve ser pelo menos 1.")
+        if not 0 < fracao_refinamento <= 1:
+            raise ValueError("A fração de refinamento deve estar em (0, 1].")
+        self.tamanho_lote = tamanho_lote
+        self.fracao_refinamento = fracao_refinamento
+
+        # Gerador próprio: cada instância (e cada processo trabalhador) tem
+        # sua sequência reproduzível, sem depender do estado global de `random`.
+        self.random_seed = random_seed
+        self.rng = random.Random(random_seed)
         
         self.alpha = alpha
         self.iteracoes_sem_melhora = 0
         self.limite_sem_melhora = limite_sem_melhora
 
+        # No modo reativo cada construção sorteia alpha em ALPHAS_REATIVOS, com
+        # probabilidades refeitas a cada PERIODO_REATIVO construções avaliadas
+        # (iterações de path-relinking não contam) a partir da qualidade média
+        # das soluções que cada valor produziu; o aumento de alpha por
+        # estagnação deixa de ser usado.
+        self.alpha_reativo = alpha_reativo
+        self._reiniciar_alphas()
+
+        # Conjunto elite de até `tamanho_elite` soluções boas e distintas
+        # (0 desliga). A cada `frequencia_relinking` iterações uma delas é
+        # ligada a outra por path-relinking no lugar da construção, e ao fim
+        # do laço todos os pares são ligados.
+        if frequencia_relinking < 1:
+            raise ValueError("A frequência de relinking deve ser pelo menos 1.")
+        self.tamanho_elite = tamanho_elite
+        self.frequencia_relinking = frequencia_relinking
+        self.elite = []
+
+        # Busca em vizinhança grande (LNS) depois do laço, no tempo que sobrar
+        # do prazo: `lns_bins` containers pouco ocupados (0 desliga) são
+        # desfeitos e o modelo exato do CP-SAT tenta pôr seus itens em um a
+        # menos, com até `tempo_reparo_lns` segundos por tentativa e
+        # `threads_reparo_lns` workers (0 = padrão de pli.threads_padrao).
+        if lns_bins == 1 or lns_bins < 0:
+            raise ValueError("O LNS precisa destruir pelo menos 2 containers (ou 0 para desligar).")
+        self.lns_bins = lns_bins
+        self.tempo_reparo_lns = tempo_reparo_lns
+        self.threads_reparo_lns = threads_reparo_lns
+
         self.melhor_solucao = None
+        # Instante (time.time()) em que a solução heurística inicial foi obtida.
+        self._tempo_incumbente = None
         self.melhor_custo = float('inf')
+
+        # Marcas da busca shift: (origem, destino) -> versões dos dois
+        # containers quando o par foi varrido sem achar movimento.
+        self._pares_sem_melhora = {}
         self.tempo_inicio = None
 
+        # (melhor número de bins, evento de parada) partilhados entre processos
+        self._compartilhado = None
+
+        # API "anytime" de `executar`: função chamada com (solução, segundos
+        # desde o início) a cada nova melhor solução, e um objeto com
+        # is_set() (por exemplo, threading.Event) que cancela a execução. Com
+        # `incumbente_heuristica`, o resultado do FFF/HFF determinístico é o
+        # primeiro incumbente, antes de qualquer iteração.
+        self.incumbente_heuristica = incumbente_heuristica
+        self._ao_melhorar = None
+        self._cancelamento = None
+
+        # Com a opção ativa, `executar` calcula o limite inferior de Martello e
+        # Vigo e para assim que a melhor solução o atinge (ela é ótima).
+        self.parar_no_limite_inferior = parar_no_limite_inferior
+        self.limite_inferior = None
+
+        # Com a opção ativa, quando um item não cabe no arranjo atual de um
+        # container o shift tenta reempacotar o container inteiro com o item;
+        # o resultado fica no cache de viabilidade, indexado pelas dimensões
+        # dos itens.
+        self.reempacotar = reempacotar
+        self.tamanho_cache_viabilidade = tamanho_cache_viabilidade
+        self.cache_viabilidade = CacheViabilidade(tamanho_cache_viabilidade)
+
+        # Impressão digital de cada solução construída -> custo depois da
+        # busca local. Uma construção repetida não passa pela busca de novo.
+        self._solucoes_vistas = OrderedDict()
+        self.iteracoes_repetidas = 0
+
     def _calcular_ocupacao(self, container):
-        """Calcula a área total ocupada por itens em um container."""
-        area_total = 0
-        if isinstance(container, ContainerFFF):
-            for item in container.itens_empacotados:
-                area_total += item.largura * item.altura
-        elif isinstance(container, ContainerHFF):
-            for lvl in container.levels:
-                for item in lvl.itens:
-                    area_total += item.largura * item.altura
-        return area_total
+        """Área total ocupada por itens em um container (mantida pelo próprio container)."""
+        return container.area_ocupada
 
     def _funcao_objetivo_secundaria(self, solucao):
         """
@@ -52,69 +164,72 @@ class GRASP:
     def _get_custo(self, solucao):
         return (len(solucao), -self._funcao_objetivo_secundaria(solucao))
 
+    def _custo_apos_shift(self, custo_atual, c_orig, c_dest, item):
+        """
+        Custo da solução após mover `item` de `c_orig` para `c_dest`, em O(1).
+        Só as parcelas dos dois containers mudam na soma dos quadrados e um bin
+        some quando a origem fica vazia.
+        """
+        area = item.largura * item.altura
+        ocup_orig, ocup_dest = c_orig.area_ocupada, c_dest.area_ocupada
+        variacao = (ocup_orig - area) ** 2 + (ocup_dest + area) ** 2 - ocup_orig ** 2 - ocup_dest ** 2
+        bins = custo_atual[0] - (1 if c_orig.num_itens == 1 else 0)
+        return (bins, custo_atual[1] - variacao)
+
     def _get_itens(self, container):
         """Retorna lista plana de itens de qualquer tipo de container."""
-        if isinstance(container, ContainerFFF):
-            return list(container.itens_empacotados)
-        elif isinstance(container, ContainerHFF):
-            return [item for lvl in container.levels for item in lvl.itens]
-        return []
+        return container.itens()
 
     def _remover_item_container(self, container, item_alvo):
         """Remove um item de um container (FFF ou HFF) e atualiza seus estados."""
-        if isinstance(container, ContainerFFF):
-            container.itens_empacotados = [it for it in container.itens_empacotados if it.id != item_alvo.id]
-        
-        elif isinstance(container, ContainerHFF):
-            for i_lvl, lvl in enumerate(container.levels):
-                tam_antes = len(lvl.itens)
-                lvl.itens = [it for it in lvl.itens if it.id != item_alvo.id]
-                
-                if len(lvl.itens) < tam_antes:
-                    lvl.largura_ocupada -= item_alvo.largura
-                    
-                    if len(lvl.itens) == 0:
-                        container.altura_ocupada -= lvl.altura
-                        container.levels.pop(i_lvl)
-                    break
+        container.remover_item_pelo_id(item_alvo.id)
 
-    def _adicionar_item_container(self, container, item):
-        if isinstance(container, ContainerFFF):
-            return container.tentar_empacotar_item(item)
-        elif isinstance(container, ContainerHFF):
-            for lvl in container.levels:
-                if lvl.tentar_adicionar_item(item):
-                    return True
-            if item.altura <= container.altura_disponivel():
-                novo_lvl = Level(item.altura, container.largura_max)
-                novo_lvl.tentar_adicionar_item(item)
-                return container.tentar_adicionar_level(novo_lvl)
+    def _adicionar_item_container(self, container, item, reempacotar=True):
+        """
+        Empacota o item no arranjo atual do container. Se não couber e
+        `reempacotar` permitir, refaz o container do zero com o item, pelo
+        cache de viabilidade. O reempacotamento muda a posição dos demais
+        itens, então não pode ser usado com um diário de desfazer.
+        """
+        if container.tentar_empacotar_item(item):
+            return True
+        if not (reempacotar and self.reempacotar):
             return False
-        return False
+        arranjo = self.cache_viabilidade.arranjo_com_item(container, item, self._get_itens)
+        if arranjo is None:
+            return False
+        container.montar_arranjo(self._get_itens(container) + [item], arranjo)
+        return True
 
     def heuristica_fff_rcl(self, l_c, a_c, max_c, itens):
         """FFF Aleatorizado usando apenas ALTURA como critério (FFDH-RCL)."""
-        itens_restantes = list(itens)
+        # Itens em posições fixas, por altura decrescente: a RCL (alturas >=
+        # limite) é sempre um prefixo dessa ordem, achado por bisect, e o
+        # sorteio escolhe a k-ésima posição ainda ativa desse prefixo.
+        ordenados = sorted(itens, key=lambda item: item.altura, reverse=True)
+        alturas_negadas = [-item.altura for item in ordenados]
+        ativos = ArvoreContagem(len(ordenados))
         containers_usados = []
+        indice = IndiceContainers()
 
-        while itens_restantes:
-            criterios = [item.altura for item in itens_restantes]
-            melhor, pior = max(criterios), min(criterios)
+        while ativos.total:
+            if self._deve_parar():
+                return None
+            melhor = ordenados[ativos.kesima(0)].altura
+            pior = ordenados[ativos.kesima(ativos.total - 1)].altura
             limite = melhor - self.alpha * (melhor - pior)
 
-            rcl = [itens_restantes[i] for i, c in enumerate(criterios) if c >= limite]
-            item_escolhido = random.choice(rcl)
-            itens_restantes.remove(item_escolhido)
+            tamanho_rcl = ativos.contar_ate(bisect_right(alturas_negadas, -limite))
+            pos = ativos.kesima(self.rng.randrange(tamanho_rcl))
+            ativos.remover(pos)
+            item_escolhido = ordenados[pos]
 
-            item_alocado = False
-            for container in containers_usados:
-                if container.tentar_empacotar_item(item_escolhido):
-                    item_alocado = True
-                    break
+            item_alocado = empacotar_first_fit(containers_usados, indice, item_escolhido) != -1
             if not item_alocado and len(containers_usados) < max_c:
                 novo_c = ContainerFFF(len(containers_usados)+1, l_c, a_c)
                 if novo_c.tentar_empacotar_item(item_escolhido):
                     containers_usados.append(novo_c)
+                    indice.acrescentar(novo_c.limites_livres())
                     item_alocado = True
             
 
@@ -122,34 +237,54 @@ class GRASP:
 
     def heuristica_hff_rcl(self, l_container, a_container, max_containers, itens):
         """Fase construtiva HFF aleatorizada (baseada em altura)."""
-        itens_restantes = list(itens)
+        # Mesma organização da heuristica_hff: itens por altura decrescente,
+        # bisect para a altura livre e árvore de larguras para encher o level.
+        # Os candidatos são o sufixo que cabe na altura livre e a RCL é o
+        # começo desse sufixo; ArvoreContagem sorteia dentro dele em O(log n).
+        ordenados = sorted(itens, key=lambda item: item.altura, reverse=True)
+        alturas_negadas = [-item.altura for item in ordenados]
+        larguras = ArvoreMinimo([item.largura for item in ordenados])
+        ativos = ArvoreContagem(len(ordenados))
         containers_usados = []
 
-        while itens_restantes and len(containers_usados) < max_containers:
+        while ativos.total and len(containers_usados) < max_containers:
+            if self._deve_parar():
+                return None
             cont_atual = ContainerHFF(len(containers_usados) + 1, l_container, a_container)
             containers_usados.append(cont_atual)
 
             while True:
-                candidatos = [it for it in itens_restantes if it.altura <= cont_atual.altura_disponivel()]
-                if not candidatos:
+                inicio = bisect_left(alturas_negadas, -cont_atual.altura_disponivel())
+                antes = ativos.contar_ate(inicio)
+                if antes == ativos.total:
                     break
 
-                alturas = [it.altura for it in candidatos]
-                melhor, pior = max(alturas), min(alturas)
+                melhor = ordenados[ativos.kesima(antes)].altura
+                pior = ordenados[ativos.kesima(ativos.total - 1)].altura
                 limite = melhor - self.alpha * (melhor - pior)
-                rcl = [it for it in candidatos if it.altura >= limite]
 
-                if not rcl: break
-                
-                item_escolhido = random.choice(rcl)
-                itens_restantes.remove(item_escolhido)
+                tamanho_rcl = ativos.contar_ate(bisect_right(alturas_negadas, -limite)) - antes
+                pos = ativos.kesima(antes + self.rng.randrange(tamanho_rcl))
+                item_escolhido = ordenados[pos]
+                larguras.remover(pos)
+                ativos.remover(pos)
 
                 novo_level = Level(item_escolhido.altura, l_container)
                 novo_level.tentar_adicionar_item(item_escolhido)
 
-                for i in range(len(itens_restantes) - 1, -1, -1):
-                    if novo_level.tentar_adicionar_item(itens_restantes[i]):
-                        itens_restantes.pop(i)
+                # Só entram itens não mais altos que o level, do mais alto para
+                # o mais baixo; a largura residual só diminui, então cada busca
+                # continua à direita do último item colocado.
+                inicio_level = bisect_left(alturas_negadas, -item_escolhido.altura)
+                while True:
+                    residual = novo_level.max_largura - novo_level.largura_ocupada
+                    i = larguras.primeiro_ate(inicio_level, len(ordenados), residual)
+                    if i == -1:
+                        break
+                    novo_level.tentar_adicionar_item(ordenados[i])
+                    larguras.remover(i)
+                    ativos.remover(i)
+                    inicio_level = i + 1
 
                 if not cont_atual.tentar_adicionar_level(novo_level):
                     break 
@@ -157,148 +292,969 @@ class GRASP:
         return containers_usados
 
     def construir_solucao(self, l_c, a_c, max_c, itens):
+        """Solução construída pela estratégia escolhida, ou None se a execução foi interrompida."""
         if self.estrategia_construcao == "fff":
             return self.heuristica_fff_rcl(l_c, a_c, max_c, itens)
         elif self.estrategia_construcao == "hff":
             return self.heuristica_hff_rcl(l_c, a_c, max_c, itens)
         raise ValueError("Estratégia de construção desconhecida.")
 
+    def _reiniciar_alphas(self):
+        k = len(ALPHAS_REATIVOS)
+        self.probabilidades_alpha = [1 / k] * k
+        self._somas_alpha = [0.0] * k
+        self._usos_alpha = [0] * k
+        self._amostras_alpha = 0
+        self._melhor_qualidade = float('inf')
+        # (iteração, probabilidades) a cada atualização, a inicial inclusa.
+        self.historico_alpha = [(0, tuple(self.probabilidades_alpha))]
+
+    def _construir(self, l_c, a_c, max_c, itens):
+        """Constrói uma solução e devolve (solução, índice do alpha sorteado ou None)."""
+        indice_alpha = None
+        if self.alpha_reativo:
+            indice_alpha = self.rng.choices(range(len(ALPHAS_REATIVOS)), weights=self.probabilidades_alpha)[0]
+            self.alpha = ALPHAS_REATIVOS[indice_alpha]
+        return self.construir_solucao(l_c, a_c, max_c, itens), indice_alpha
+
+    def _proxima_construcao(self, l_c, a_c, max_c, itens, selecionadas):
+        """
+        Solução inicial da próxima iteração, com o índice do alpha usado.
+        Com lotes, `selecionadas` guarda as melhores construções do lote
+        atual ainda não refinadas, a melhor no fim; quando se esgota, um
+        novo lote é construído e filtrado.
+        """
+        if self.tamanho_lote == 1:
+            return self._construir(l_c, a_c, max_c, itens)
+        if not selecionadas:
+            lote = []
+            for _ in range(self.tamanho_lote):
+                construida = self._construir(l_c, a_c, max_c, itens)
+                if construida[0] is None:
+                    return construida
+                lote.append(construida)
+            lote.sort(key=lambda construida: self._get_custo(construida[0]))
+            num_refinadas = max(1, math.ceil(self.tamanho_lote * self.fracao_refinamento))
+            selecionadas.extend(reversed(lote[:num_refinadas]))
+        return selecionadas.pop()
+
+    def _qualidade(self, custo, capacidade):
+        """
+        Custo em um único número positivo, menor é melhor: o número de bins
+        mais um, menos a média dos quadrados das ocupações relativas (que
+        fica em (0, 1]).
+        """
+        bins, f_sec_negada = custo
+        return bins + 1 + f_sec_negada / (capacidade * capacidade * bins)
+
+    def _registrar_alpha(self, indice_alpha, custo, capacidade, iteracao):
+        """
+        Acumula a qualidade obtida pelo alpha e, a cada PERIODO_REATIVO
+        amostras, refaz as probabilidades. O período conta amostras, não
+        iterações: as de path-relinking não constroem e não registram nada.
+        """
+        qualidade = self._qualidade(custo, capacidade)
+        self._somas_alpha[indice_alpha] += qualidade
+        self._usos_alpha[indice_alpha] += 1
+        self._amostras_alpha += 1
+        self._melhor_qualidade = min(self._melhor_qualidade, qualidade)
+        if self._amostras_alpha % PERIODO_REATIVO:
+            return
+
+        # q_i = (melhor / média_i) ^ EXPOENTE; um alpha ainda não usado recebe
+        # a média dos demais para continuar sendo sorteado.
+        q = [(self._melhor_qualidade * usos / soma) ** EXPOENTE_REATIVO if usos else None
+             for soma, usos in zip(self._somas_alpha, self._usos_alpha)]
+        usados = [v for v in q if v is not None]
+        media = sum(usados) / len(usados)
+        q = [media if v is None else v for v in q]
+        total = sum(q)
+        self.probabilidades_alpha = [v / total for v in q]
+        self.historico_alpha.append((iteracao, tuple(self.probabilidades_alpha)))
+        print(f"[{time.time()-self.tempo_inicio:.2f}s] Probabilidades de alpha (Iter {iteracao}): "
+              + ", ".join(f"{a}: {p:.3f}" for a, p in zip(ALPHAS_REATIVOS, self.probabilidades_alpha)))
+
     def _obter_info_posicao(self, container, item_alvo):
         """Retorna dados necessários para restaurar o item na posição exata."""
-        if isinstance(container, ContainerFFF):
-            for i, item in enumerate(container.itens_empacotados):
-                if item.id == item_alvo.id:
-                    return container.posicoes_itens[i]
-        elif isinstance(container, ContainerHFF):
-             for i_lvl, lvl in enumerate(container.levels):
-                 for item in lvl.itens:
-                     if item.id == item_alvo.id:
-                         return (i_lvl, item)
-        return None
+        return container.obter_posicao(item_alvo.id)
 
     def _restaurar_item_container(self, container, item, info_posicao):
         """Força a re-inserção do item na posição original (Undo)."""
-        if isinstance(container, ContainerFFF):
-            x, y = info_posicao
-            # Usa o método que força a posição e atualiza os pontos
-            container.adicionar_item(item, x, y)
-            return True
-            
-        elif isinstance(container, ContainerHFF):
-            i_lvl_orig, _ = info_posicao
-            # Tenta colocar de volta no nível original se ele ainda existir
-            if i_lvl_orig < len(container.levels):
-                 lvl = container.levels[i_lvl_orig]
-                 if lvl.altura == item.altura and (lvl.largura_ocupada + item.largura <= lvl.max_largura):
-                     lvl.itens.append(item)
-                     lvl.largura_ocupada += item.largura
-                     return True
-
-            return self._adicionar_item_container(container, item)
+        return container.restaurar_item(item, info_posicao)
+
+    def _aplicar_shift(self, solucao, movimento):
+        """
+        Aplica o movimento (item, origem, destino) registrado no diário da busca
+        e devolve a solução sem os containers que ficaram vazios.
+        """
+        item, c_orig, c_dest = movimento
+        # O teste do movimento garantiu que o item cabe; se ainda assim a
+        # inserção falhar, o item fica na origem e a solução não muda.
+        if not self._adicionar_item_container(c_dest, item):
+            return solucao
+        c_orig.remover_item_pelo_id(item.id)
+        return [c for c in solucao if c.num_itens > 0]
+
+    def _cabe_reempacotando(self, container, item):
+        """Indica, sem alterar o container, se o reempacotamento o faria aceitar o item."""
+        return (self.reempacotar and
+                self.cache_viabilidade.arranjo_com_item(container, item, self._get_itens) is not None)
 
     def procurar_vizinho(self, solucao):
         """
         Busca local 'Shift' sem deepcopy, usando reversão de movimentos.
+        Cada movimento é avaliado por diferença em O(1) e só é testado nos
+        containers se puder melhorar o custo. O melhor movimento encontrado
+        fica registrado como (item, origem, destino) e é aplicado uma única
+        vez ao final da varredura.
+
+        Os destinos de um item são os containers com área livre suficiente,
+        do mais cheio ao mais vazio: nessa ordem o ganho do movimento só
+        diminui, então a varredura do item para no primeiro destino que não
+        melhora o custo. Um par (origem, destino) sem nenhum movimento que
+        melhore e caiba fica marcado com as versões dos dois containers e
+        não é testado de novo enquanto nenhum deles mudar; uma origem sem
+        destinos em aberto é pulada inteira.
         """
-        melhor_custo = self._get_custo(solucao)
-        melhor_vizinho_snapshot = None 
-        melhorou = False
-        tipo_busca = "first" if self.estrategia_busca == "first_improving" else "best"
+        custo_atual = self._get_custo(solucao)
+        melhor_custo = custo_atual
+        melhor_movimento = None
+        tipo_busca = self.tipo_busca
 
-        indices_containers = list(range(len(solucao)))
-        
-        for i_orig in indices_containers:
-            c_orig = solucao[i_orig]
-            itens_origem = list(self._get_itens(c_orig))
-
-            for item in itens_origem:
-                if time.time() - self.tempo_inicio > self.tempo_max:
-                    return melhor_vizinho_snapshot if melhor_vizinho_snapshot else solucao
-
-                for i_dest in indices_containers:
-                    if i_orig == i_dest: continue
-                    c_dest = solucao[i_dest]
-
-                    info_origem = self._obter_info_posicao(c_orig, item)
-                    
-                    if self._adicionar_item_container(c_dest, item):
-                        c_orig.remover_item_pelo_id(item.id) 
-                        
-                        sol_temp = [c for c in solucao if len(self._get_itens(c)) > 0]
-                        novo_custo = self._get_custo(sol_temp)
-
-                        if novo_custo < melhor_custo:
-                            melhor_custo = novo_custo
-                            melhorou = True
-                            
-                            melhor_vizinho_snapshot = copy.deepcopy(sol_temp)
-
-                            if tipo_busca == "first":
-                                c_dest.remover_item_pelo_id(item.id)
-                                self._restaurar_item_container(c_orig, item, info_origem)
-                                return melhor_vizinho_snapshot
+        # Todos os containers têm a mesma capacidade, então ordenar pela área
+        # ocupada é ordenar pela área livre.
+        capacidade = solucao[0].largura_max * solucao[0].altura_max if solucao else 0
+        ordenados = sorted(solucao, key=lambda c: c.area_ocupada, reverse=True)
+
+        for c_orig in solucao:
+            versao_orig = c_orig.versao
+            destinos = [c for c in ordenados if c is not c_orig and
+                        self._pares_sem_melhora.get((c_orig, c)) != (versao_orig, c.versao)]
+            if not destinos:
+                continue
+            ocupacoes_negadas = [-c.area_ocupada for c in destinos]
+            # Destinos em que algum item pode ter movimento que melhora e cabe.
+            em_aberto = set()
+
+            for item in list(self._get_itens(c_orig)):
+                if self._deve_parar():
+                    return self._aplicar_shift(solucao, melhor_movimento) if melhor_movimento else solucao
+
+                inicio = bisect_left(ocupacoes_negadas, item.largura * item.altura - capacidade)
+                for k in range(inicio, len(destinos)):
+                    c_dest = destinos[k]
+                    novo_custo = self._custo_apos_shift(custo_atual, c_orig, c_dest, item)
+                    if not novo_custo < custo_atual:
+                        break
+                    if not novo_custo < melhor_custo:
+                        em_aberto.update(destinos[k:])
+                        break
+
+                    # O teste não pode alterar o destino: uma inserção no
+                    # arranjo atual é desfeita logo depois, e o reempacotamento
+                    # só é consultado no cache; o movimento é refeito sobre o
+                    # mesmo estado quando for aplicado.
+                    colocado = c_dest.tentar_empacotar_item(item)
+                    if not colocado and not self._cabe_reempacotando(c_dest, item):
+                        continue
+                    melhor_custo = novo_custo
+                    melhor_movimento = (item, c_orig, c_dest)
+
+                    if tipo_busca == "first":
+                        if not colocado:
+                            return self._aplicar_shift(solucao, melhor_movimento)
+                        c_orig.remover_item_pelo_id(item.id)
+                        return [c for c in solucao if c.num_itens > 0]
 
+                    if colocado:
                         c_dest.remover_item_pelo_id(item.id)
-                        self._restaurar_item_container(c_orig, item, info_origem)
+                    em_aberto.update(destinos[k:])
+                    break
 
-        return melhor_vizinho_snapshot if melhorou else solucao
+            for c_dest in destinos:
+                if c_dest not in em_aberto:
+                    self._pares_sem_melhora[(c_orig, c_dest)] = (versao_orig, c_dest.versao)
 
-    def busca_local(self, solucao_inicial):
+        return self._aplicar_shift(solucao, melhor_movimento) if melhor_movimento else solucao
+
+    def _remover_registrando(self, container, item, diario):
+        """Remove o item e anota no diário como recolocá-lo no mesmo lugar."""
+        diario.append((container, item, self._obter_info_posicao(container, item)))
+        self._remover_item_container(container, item)
+
+    def _adicionar_registrando(self, container, item, diario):
+        """Tenta empacotar o item e, se couber, anota a inserção no diário."""
+        if not self._adicionar_item_container(container, item, reempacotar=False):
+            return False
+        diario.append((container, item, None))
+        return True
+
+    def _desfazer(self, diario, marca=0):
+        """Desfaz as operações do diário posteriores a `marca`, da última para a primeira."""
+        while len(diario) > marca:
+            container, item, info_posicao = diario.pop()
+            if info_posicao is None:
+                self._remover_item_container(container, item)
+            else:
+                self._restaurar_item_container(container, item, info_posicao)
+
+    def _trocar(self, c1, itens1, c2, itens2):
+        """
+        Passa `itens1` de c1 para c2 e `itens2` de c2 para c1. Devolve o diário
+        da troca ou, se algum item não couber, desfaz tudo e devolve None.
+        """
+        diario = []
+        for item in itens1:
+            self._remover_registrando(c1, item, diario)
+        for item in itens2:
+            self._remover_registrando(c2, item, diario)
+        for container, itens in ((c1, itens2), (c2, itens1)):
+            for item in itens:
+                if not self._adicionar_registrando(container, item, diario):
+                    self._desfazer(diario)
+                    return None
+        return diario
+
+    def _procurar_troca(self, solucao, tamanho_grupo):
+        """
+        Troca `tamanho_grupo` itens de um container por um item de outro. O
+        número de bins não muda: a troca melhora o custo quando concentra área
+        no container mais cheio, o que abre caminho para o shift esvaziar o
+        outro. Por isso um dos lados é sempre o container menos ocupado: cada
+        troca aplicada o esvazia um pouco mais e a vizinhança fica linear no
+        número de containers.
+
+        Para cada grupo, os itens dos outros containers que melhoram o custo e
+        respeitam as áreas livres formam intervalos da lista ordenada por área,
+        achados por bisect. Com o grupo retirado uma única vez, cada candidato
+        é testado no lado do grupo; só os que cabem ali passam pelo teste da
+        troca completa.
+        """
+        custo_atual = self._get_custo(solucao)
+        movimentos = []
+
+        por_area = []
+        for container in solucao:
+            itens = sorted(self._get_itens(container), key=lambda it: it.largura * it.altura)
+            por_area.append((itens, [it.largura * it.altura for it in itens]))
+
+        alvo = min(range(len(solucao)), key=lambda i: solucao[i].area_ocupada)
+        for i, c1 in enumerate(solucao):
+            # O grupo sai do menos ocupado para qualquer outro, ou (2-1) de
+            # qualquer outro para ele; na troca 1-1 os dois sentidos coincidem.
+            if i == alvo:
+                outros = [j for j in range(len(solucao)) if j != alvo]
+            elif tamanho_grupo > 1:
+                outros = [alvo]
+            else:
+                continue
+            o1 = c1.area_ocupada
+            livre1 = c1.largura_max * c1.altura_max - o1
 
+            for grupo in combinations(por_area[i][0], tamanho_grupo):
+                if self._deve_parar():
+                    return solucao
+                s = sum(it.largura * it.altura for it in grupo)
+                diario = []
+                for item in grupo:
+                    self._remover_registrando(c1, item, diario)
+
+                candidatos = []
+                for j in outros:
+                    c2 = solucao[j]
+                    o2 = c2.area_ocupada
+                    livre2 = c2.largura_max * c2.altura_max - o2
+                    itens2, areas2 = por_area[j]
+                    # Com d = área do item - s, a soma dos quadrados cresce sse
+                    # d * (o1 - o2 + d) > 0; as áreas livres limitam d a [-livre2, livre1].
+                    faixas = chain(
+                        range(bisect_right(areas2, s + max(0, o2 - o1)), bisect_right(areas2, s + livre1)),
+                        range(bisect_left(areas2, s - livre2), bisect_left(areas2, s + min(0, o2 - o1))))
+                    for k in faixas:
+                        d = areas2[k] - s
+                        variacao = (o1 + d) ** 2 + (o2 - d) ** 2 - o1 ** 2 - o2 ** 2
+                        # O item sai de c1 logo em seguida, deixando-o como estava.
+                        if self._adicionar_item_container(c1, itens2[k], reempacotar=False):
+                            self._remover_item_container(c1, itens2[k])
+                            candidatos.append((custo_atual[1] - variacao, c2, itens2[k]))
+                self._desfazer(diario)
+
+                if self.tipo_busca == "first":
+                    for _, c2, item in candidatos:
+                        if self._trocar(c1, grupo, c2, (item,)) is not None:
+                            return solucao
+                else:
+                    movimentos.extend((custo, c1, grupo, c2, item) for custo, c2, item in candidatos)
+
+        # Best improving: a primeira troca viável em ordem de custo é a melhor.
+        movimentos.sort(key=lambda m: m[0])
+        for _, c1, grupo, c2, item in movimentos:
+            if self._trocar(c1, grupo, c2, (item,)) is not None:
+                return solucao
+        return solucao
+
+    def _vizinho_swap(self, solucao):
+        """Vizinhança swap 1-1: um item de um container por um item de outro."""
+        return self._procurar_troca(solucao, 1)
+
+    def _vizinho_swap21(self, solucao):
+        """Vizinhança swap 2-1: dois itens de um container por um item de outro."""
+        return self._procurar_troca(solucao, 2)
+
+    def _reinserir(self, item, containers, diario):
+        """
+        Empacota o item no primeiro container que o aceite. Se nenhum aceitar,
+        tenta uma cadeia de ejeção: tira de um container um item menor, coloca
+        `item` no lugar e o item ejetado em outro container.
+        """
+        for container in containers:
+            if self._adicionar_registrando(container, item, diario):
+                return True
+
+        area = item.largura * item.altura
+        for container in containers:
+            if self._deve_parar():
+                return False
+            livre = container.largura_max * container.altura_max - container.area_ocupada
+            for ejetado in self._get_itens(container):
+                area_ejetado = ejetado.largura * ejetado.altura
+                if area_ejetado >= area or area - area_ejetado > livre:
+                    continue
+                marca = len(diario)
+                self._remover_registrando(container, ejetado, diario)
+                if self._adicionar_registrando(container, item, diario):
+                    for destino in containers:
+                        if destino is not container and self._adicionar_registrando(destino, ejetado, diario):
+                            return True
+                self._desfazer(diario, marca)
+        return False
+
+    def _vizinho_ejecao(self, solucao):
+        """
+        Tenta esvaziar um container, do menos ocupado ao mais ocupado,
+        reinserindo seus itens (maiores primeiro) nos demais. Todo sucesso
+        elimina um bin, então o primeiro é aplicado; uma tentativa que falha
+        é desfeita pelo diário.
+        """
+        area_livre_total = sum(c.largura_max * c.altura_max - c.area_ocupada for c in solucao)
+        for c_alvo in sorted(solucao, key=lambda c: c.area_ocupada):
+            if self._deve_parar():
+                break
+            livre_alvo = c_alvo.largura_max * c_alvo.altura_max - c_alvo.area_ocupada
+            if c_alvo.area_ocupada > area_livre_total - livre_alvo:
+                continue
+
+            outros = [c for c in solucao if c is not c_alvo]
+            itens = sorted(self._get_itens(c_alvo), key=lambda it: it.largura * it.altura, reverse=True)
+            diario = []
+            for item in itens:
+                self._remover_registrando(c_alvo, item, diario)
+            if all(self._reinserir(item, outros, diario) for item in itens):
+                return outros
+            self._desfazer(diario)
+        return solucao
+
+    def busca_local(self, solucao_inicial):
+        """
+        Descida em vizinhança variável (VND): aplica a vizinhança atual enquanto
+        ela melhora a solução, passa para a seguinte (mais cara) quando ela
+        falha e volta ao shift depois de qualquer melhora. Só com o shift é a
+        descida simples de sempre.
+        """
+        vizinhancas = {"shift": self.procurar_vizinho, "swap": self._vizinho_swap,
+                       "swap21": self._vizinho_swap21, "ejecao": self._vizinho_ejecao}
         solucao_atual = solucao_inicial
         custo_atual = self._get_custo(solucao_atual)
+        self._pares_sem_melhora = {}
 
-        while True:
-            nova_solucao = self.procurar_vizinho(solucao_atual)
+        k = 0
+        while k < len(self.vizinhancas):
+            nova_solucao = vizinhancas[self.vizinhancas[k]](solucao_atual)
             custo_nova_solucao = self._get_custo(nova_solucao)
             
             if custo_nova_solucao < custo_atual:
                 solucao_atual = nova_solucao
                 custo_atual = custo_nova_solucao
+                k = 0
             else:
-                break
+                k += 1
         return solucao_atual
 
 
-    def executar(self, caminho_instancia, valor_alvo=0):
-        self.tempo_inicio = time.time()
-        l_c, a_c, max_c, itens = carregar_instancia_json(caminho_instancia)
-        tempo_melhor_solucao = self.tempo_inicio
+    def _impressao_digital(self, solucao):
+        """
+        Identifica a solução pelos arranjos dos containers, sem os ids dos
+        itens (itens de mesmas dimensões são intercambiáveis) e sem a ordem
+        dos containers.
+        """
+        return tuple(sorted(container.arranjo() for container in solucao))
+
+    def _custo_conhecido(self, impressao):
+        """Custo refinado de uma solução já buscada, ou None."""
+        custo = self._solucoes_vistas.get(impressao)
+        if custo is not None:
+            self._solucoes_vistas.move_to_end(impressao)
+        return custo
+
+    def _registrar_busca(self, impressao, custo):
+        self._solucoes_vistas[impressao] = custo
+        if len(self._solucoes_vistas) > LIMITE_SOLUCOES_VISTAS:
+            self._solucoes_vistas.popitem(last=False)
+
+    def _novo_container(self, id, largura, altura):
+        if self.estrategia_construcao == "fff":
+            return ContainerFFF(id, largura, altura)
+        return ContainerHFF(id, largura, altura)
+
+    def _copiar_container(self, container):
+        """Container novo com os mesmos itens, no mesmo arranjo."""
+        copia = self._novo_container(container.id, container.largura_max, container.altura_max)
+        copia.montar_arranjo(self._get_itens(container), container.arranjo())
+        return copia
+
+    def _entrada_elite(self, solucao):
+        """Cópia compacta da solução para o conjunto elite (ver `Solucao`)."""
+        return Solucao.de_containers(solucao)
+
+    def _distancia(self, entrada_a, entrada_b):
+        """
+        Número de itens fora do lugar entre duas soluções: cada container de
+        uma é pareado (guloso, por maior interseção) com um da outra, e os
+        itens que não estão nos containers pareados contam na distância.
+        """
+        num_bins_b = len(entrada_b)
+        pares, intersecoes = np.unique(entrada_a.bin.astype(np.int64) * num_bins_b + entrada_b.bin,
+                                       return_counts=True)
+        ordem = np.argsort(-intersecoes, kind="stable")
+        usados_a, usados_b = set(), set()
+        em_comum = 0
+        for par, n in zip(pares[ordem].tolist(), intersecoes[ordem].tolist()):
+            a, b = divmod(par, num_bins_b)
+            if a not in usados_a and b not in usados_b:
+                usados_a.add(a)
+                usados_b.add(b)
+                em_comum += n
+        return len(entrada_a.bin) - em_comum
+
+    def _atualizar_elite(self, solucao):
+        """
+        Uma solução diferente de todas entra no conjunto elite enquanto ele
+        não está cheio; depois, só se for melhor que alguma, no lugar da mais
+        parecida com ela entre as piores.
+        """
+        entrada = self._entrada_elite(solucao)
+        distancias = [self._distancia(e, entrada) for e in self.elite]
+        if 0 in distancias:
+            return
+        if len(self.elite) < self.tamanho_elite:
+            self.elite.append(entrada)
+            return
+        custo = entrada.custo()
+        piores = [i for i, e in enumerate(self.elite) if e.custo() > custo]
+        if piores:
+            self.elite[min(piores, key=lambda i: distancias[i])] = entrada
+
+    def path_relinking(self, origem, guia, itens):
+        """
+        Caminha da solução `origem` até `guia` (entradas do conjunto elite)
+        trazendo, um por vez, os containers da guia: os itens de um container
+        da guia saem de onde estão e voltam juntos, no arranjo da guia. A
+        cada passo entra o container de menor custo resultante. A melhor
+        solução intermediária passa pela busca local e é devolvida.
+        """
+        por_indice = sorted(itens, key=lambda item: item.id)
+        indices_guia = guia.itens_por_bin()
+        itens_guia = [[por_indice[i] for i in indices.tolist()] for indices in indices_guia]
+
+        atual = origem.containers(por_indice)
+        proximo_id = len(atual) + 1
+        onde = {item.id: c for c in atual for item in self._get_itens(c)}
+
+        # Containers da guia que já existem na origem não precisam ser trazidos.
+        conjuntos_atuais = {frozenset(indices.tolist()) for indices in origem.itens_por_bin()}
+        pendentes = [b for b, indices in enumerate(indices_guia)
+                     if frozenset(indices.tolist()) not in conjuntos_atuais]
+
+        custo = self._get_custo(atual)
+        melhor, melhor_custo = None, None
+        # O último passo levaria à própria guia.
+        while len(pendentes) > 1:
+            if self._deve_parar():
+                break
+            escolhido, custo_escolhido = None, None
+            for b in pendentes:
+                retirada = {}
+                area_b = 0
+                for item in itens_guia[b]:
+                    area = item.largura * item.altura
+                    area_b += area
+                    c = onde[item.id]
+                    area_c, n_c = retirada.get(c, (0, 0))
+                    retirada[c] = (area_c + area, n_c + 1)
+                bins = custo[0] + 1
+                f_sec_negada = custo[1] - area_b ** 2
+                for c, (area_c, n_c) in retirada.items():
+                    if n_c == c.num_itens:
+                        bins -= 1
+                    f_sec_negada += c.area_ocupada ** 2 - (c.area_ocupada - area_c) ** 2
+                if custo_escolhido is None or (bins, f_sec_negada) < custo_escolhido:
+                    escolhido, custo_escolhido = b, (bins, f_sec_negada)
+
+            pendentes.remove(escolhido)
+            for item in itens_guia[escolhido]:
+                onde[item.id].remover_item_pelo_id(item.id)
+            novo = guia.montar_container(indices_guia[escolhido], por_indice, proximo_id)
+            proximo_id += 1
+            atual = [c for c in atual if c.num_itens > 0]
+            atual.append(novo)
+            for item in itens_guia[escolhido]:
+                onde[item.id] = novo
+            custo = custo_escolhido
+
+            if melhor_custo is None or custo < melhor_custo:
+                melhor_custo = custo
+                melhor = self._entrada_elite(atual)
+
+        if melhor is None:
+            return None
+        return self.busca_local(melhor.containers(por_indice))
+
+    def _relinking_periodico(self, iteracao, itens):
+        """Na iteração de relinking, liga dois membros sorteados do conjunto elite."""
+        if (not self.tamanho_elite or len(self.elite) < 2 or
+                iteracao % self.frequencia_relinking):
+            return None
+        i, j = self.rng.sample(range(len(self.elite)), 2)
+        # Da melhor para a pior: a vizinhança da melhor é explorada mais a fundo.
+        origem, guia = sorted((self.elite[i], self.elite[j]), key=lambda e: e.custo())
+        return self.path_relinking(origem, guia, itens)
+
+    def _reparar_bins(self, containers, largura, altura):
+        """
+        Reempacota os itens de `containers` em um container a menos com o
+        modelo exato, dentro de `tempo_reparo_lns` e do tempo que resta.
+        Retorna os novos containers ou None. No FFF as posições do modelo são
+        usadas como estão; o HFF só guarda levels, então cada novo container
+        é refeito pelo próprio HFF e o reparo falha se ele não conseguir.
+        """
+        itens = [item for c in containers for item in self._get_itens(c)]
+        restante = self.tempo_max - (time.time() - self.tempo_inicio)
+        bins = empacotar_exato(itens, largura, altura, len(containers) - 1,
+                               min(self.tempo_reparo_lns, restante), self.threads_reparo_lns)
+        if bins is None:
+            return None
+        novos = []
+        for posicoes in bins:
+            container = self._novo_container(0, largura, altura)
+            if self.estrategia_construcao == "fff":
+                for item, x, y in posicoes:
+                    container.adicionar_item(item, x, y)
+            else:
+                ordenados = sorted((item for item, _, _ in posicoes),
+                                   key=lambda item: (item.altura, item.largura), reverse=True)
+                if not all(container.tentar_empacotar_item(item) for item in ordenados):
+                    return None
+            novos.append(container)
+        return novos
+
+    def busca_lns(self, largura, altura, valor_alvo):
+        """
+        LNS a partir da melhor solução: sorteia k containers entre os 2k
+        menos ocupados e tenta reempacotar seus itens em um a menos. Cada
+        reparo bem-sucedido passa pela busca local, vira a nova melhor
+        solução e k volta a `lns_bins`; depois de TENTATIVAS_LNS tentativas
+        seguidas sem sucesso, k aumenta. Para no prazo, no alvo, no limite
+        inferior ou quando k passa do número de containers. Retorna (instante
+        da última melhora ou None, atingiu o alvo, tempo até o alvo).
+        """
+        solucao = self.melhor_solucao
+        area_container = largura * altura
+        tempo_melhora = None
+        tentados = set()
+        falhas = 0
+        k = self.lns_bins
+        while not self._deve_parar():
+            limite = max(self.limite_inferior or 0,
+                         math.ceil(sum(c.area_ocupada for c in solucao) / area_container))
+            if len(solucao) <= limite:
+                break
+            if falhas >= TENTATIVAS_LNS:
+                k += 1
+                falhas = 0
+                tentados.clear()
+            if k > len(solucao):
+                break
+
+            falhas += 1
+            menos_ocupados = sorted(solucao, key=lambda c: c.area_ocupada)[:2 * k]
+            escolhidos = self.rng.sample(menos_ocupados, k)
+            if sum(c.area_ocupada for c in escolhidos) > (k - 1) * area_container:
+                continue
+            conjunto = frozenset(frozenset(item.id for item in self._get_itens(c)) for c in escolhidos)
+            if conjunto in tentados:
+                continue
+            tentados.add(conjunto)
+
+            try:
+                novos = self._reparar_bins(escolhidos, largura, altura)
+            except ImportError as erro:
+                print(f"LNS indisponível: {erro}")
+                break
+            if novos is None:
+                continue
+
+            proximo_id = max(c.id for c in solucao) + 1
+            for c in novos:
+                c.id = proximo_id
+                proximo_id += 1
+            # A solução atual já foi entregue a `ao_melhorar`: a busca local
+            # trabalha sobre cópias dos containers que ficam.
+            mantidos = [self._copiar_container(c) for c in solucao if c not in escolhidos]
+            solucao = self.busca_local(mantidos + novos)
+            k = self.lns_bins
+            falhas = 0
+            tentados.clear()
+
+            self._publicar_bins(len(solucao))
+            self.melhor_solucao = solucao
+            tempo_melhora = time.time() - self.tempo_inicio
+            print(f"[{tempo_melhora:.2f}s] Nova melhor solução: {len(solucao)} bins (LNS)")
+            self._notificar(solucao)
+            if valor_alvo != 0 and len(solucao) <= valor_alvo:
+                return tempo_melhora, True, tempo_melhora
+        return tempo_melhora, False, 0
+
+    def _deve_parar(self):
+        """
+        Verifica o limite de tempo, o cancelamento pedido pelo chamador e, no
+        modo paralelo, o sinal de parada comum. Construção, busca local e
+        path-relinking consultam esta função a cada item, grupo ou passo.
+        """
+        if time.time() - self.tempo_inicio > self.tempo_max:
+            return True
+        if self._cancelamento is not None and self._cancelamento.is_set():
+            return True
+        return self._compartilhado is not None and self._compartilhado[1].is_set()
+
+    def _notificar(self, solucao):
+        """Entrega a nova melhor solução à função `ao_melhorar` de `executar`, se houver."""
+        if self._ao_melhorar is not None:
+            self._ao_melhorar(solucao, time.time() - self.tempo_inicio)
+
+    def _incumbente_inicial(self, l_c, a_c, max_c, itens, valor_alvo):
+        """
+        Usa o FFF ou o HFF determinístico, conforme a construção, como
+        primeira solução. Se ela já atinge o alvo ou o limite inferior, a
+        execução termina aí: retorna (iterações, tempo da melhor solução,
+        atingiu o alvo, tempo até o alvo) como o laço principal; senão None.
+        """
+        if self.estrategia_construcao == "fff":
+            solucao = heuristica_fff(l_c, a_c, max_c, list(itens))
+        else:
+            solucao = heuristica_hff(l_c, a_c, max_c, list(itens))
+        if not solucao:
+            return None
+        self.melhor_solucao = solucao
+        self._tempo_incumbente = time.time()
+        tempo = self._tempo_incumbente - self.tempo_inicio
+        print(f"[{tempo:.2f}s] Solução inicial ({self.estrategia_construcao.upper()}): {len(solucao)} bins")
+        self._notificar(solucao)
+
+        if valor_alvo != 0 and len(solucao) <= valor_alvo:
+            return 0, tempo, True, tempo
+        if self.limite_inferior is not None and len(solucao) <= self.limite_inferior:
+            print(f"[{tempo:.2f}s] Solução ótima: limite inferior de {self.limite_inferior} bins atingido (solução inicial)")
+            return 0, tempo, False, 0
+        return None
+
+    def _publicar_bins(self, num_bins):
+        """
+        Atualiza o melhor número de bins partilhado e indica se ele melhorou.
+        Fora do modo paralelo compara apenas com a melhor solução local.
+        """
+        if self._compartilhado is None:
+            return self.melhor_solucao is None or num_bins < len(self.melhor_solucao)
+        melhor_global = self._compartilhado[0]
+        with melhor_global.get_lock():
+            if num_bins < melhor_global.value:
+                melhor_global.value = num_bins
+                return True
+        return False
+
+    def _contar_sem_melhora(self, melhorou):
+        """Aumenta alpha depois de `limite_sem_melhora` iterações seguidas sem melhora."""
+        if self.alpha_reativo:
+            return
+        if melhorou:
+            self.iteracoes_sem_melhora = 0
+        else:
+            self.iteracoes_sem_melhora += 1
+
+        if self.iteracoes_sem_melhora >= self.limite_sem_melhora:
+            self.alpha = min(1.0, self.alpha + 0.1)
+            self.iteracoes_sem_melhora = 0
+
+    def _laco_principal(self, l_c, a_c, max_c, itens, valor_alvo, iteracoes_max):
+        """Iterações de construção + busca local até o limite, o alvo ou a parada."""
+        # Sem nenhuma melhora, a melhor solução é a inicial (se houver).
+        tempo_melhor_solucao = self._tempo_incumbente or self.tempo_inicio
 
         atingiu_valor_alvo = False
         tempo_ate_alvo = 0
 
+        selecionadas = []
         iteracao = 0
-        while iteracao < self.iteracoes_max:
-            if time.time() - self.tempo_inicio > self.tempo_max: break
+        while iteracao < iteracoes_max:
+            if self._deve_parar(): break
             
             iteracao += 1
-            solucao_inicial = self.construir_solucao(l_c, a_c, max_c, itens)
-            solucao_refinada = self.busca_local(solucao_inicial)
+            solucao_refinada = self._relinking_periodico(iteracao, itens)
+            if solucao_refinada is None:
+                solucao_inicial, indice_alpha = self._proxima_construcao(l_c, a_c, max_c, itens, selecionadas)
+                if solucao_inicial is None:
+                    break
+
+                # A busca local a partir de uma solução já vista chega ao mesmo
+                # ótimo local, que já passou pelas comparações abaixo.
+                impressao = self._impressao_digital(solucao_inicial)
+                custo_refinado = self._custo_conhecido(impressao)
+                if custo_refinado is not None:
+                    self.iteracoes_repetidas += 1
+                    if indice_alpha is not None:
+                        self._registrar_alpha(indice_alpha, custo_refinado, l_c * a_c, iteracao)
+                    self._contar_sem_melhora(False)
+                    continue
+                solucao_refinada = self.busca_local(solucao_inicial)
+                custo_refinado = self._get_custo(solucao_refinada)
+                self._registrar_busca(impressao, custo_refinado)
+                if indice_alpha is not None:
+                    self._registrar_alpha(indice_alpha, custo_refinado, l_c * a_c, iteracao)
+            if self.tamanho_elite:
+                self._atualizar_elite(solucao_refinada)
 
             if valor_alvo != 0 and len(solucao_refinada) <= valor_alvo and not atingiu_valor_alvo:
                 self.melhor_solucao = solucao_refinada
                 atingiu_valor_alvo = True
                 tempo_ate_alvo = time.time() - self.tempo_inicio
+                self._notificar(solucao_refinada)
+                if self._compartilhado is not None:
+                    self._publicar_bins(len(solucao_refinada))
+                    self._compartilhado[1].set()
                 break
-            
+
+            melhorou_global = self._publicar_bins(len(solucao_refinada))
             if self.melhor_solucao is None or len(solucao_refinada) < len(self.melhor_solucao):
                 self.melhor_solucao = solucao_refinada
-                self.iteracoes_sem_melhora = 0
                 tempo_melhor_solucao = time.time()
                 print(f"[{time.time()-self.tempo_inicio:.2f}s] Nova melhor solução: {len(self.melhor_solucao)} bins (Iter {iteracao})")
-            else:
-                self.iteracoes_sem_melhora += 1
-                
-            if self.iteracoes_sem_melhora >= self.limite_sem_melhora:
-                self.alpha = min(1.0, self.alpha + 0.1)
-                self.iteracoes_sem_melhora = 0
+                self._notificar(solucao_refinada)
+
+            if self.limite_inferior is not None and len(self.melhor_solucao) <= self.limite_inferior:
+                print(f"[{time.time()-self.tempo_inicio:.2f}s] Solução ótima: limite inferior de {self.limite_inferior} bins atingido (Iter {iteracao})")
+                if self._compartilhado is not None:
+                    self._compartilhado[1].set()
+                break
+
+            self._contar_sem_melhora(melhorou_global)
+
+        # Pós-otimização: com as iterações esgotadas, liga todos os pares do
+        # conjunto elite, sempre da melhor solução do par para a pior.
+        if (self.tamanho_elite and iteracao >= iteracoes_max and not atingiu_valor_alvo and
+                (self.limite_inferior is None or len(self.melhor_solucao) > self.limite_inferior)):
+            for origem, guia in combinations(sorted(self.elite, key=lambda e: e.custo()), 2):
+                if self._deve_parar():
+                    break
+                solucao = self.path_relinking(origem, guia, itens)
+                if solucao is None or len(solucao) >= len(self.melhor_solucao):
+                    continue
+                self._publicar_bins(len(solucao))
+                self.melhor_solucao = solucao
+                tempo_melhor_solucao = time.time()
+                print(f"[{time.time()-self.tempo_inicio:.2f}s] Nova melhor solução: {len(solucao)} bins (pós-otimização)")
+                self._notificar(solucao)
+                if valor_alvo != 0 and len(solucao) <= valor_alvo:
+                    atingiu_valor_alvo = True
+                    tempo_ate_alvo = time.time() - self.tempo_inicio
+                    if self._compartilhado is not None:
+                        self._compartilhado[1].set()
+                    break
+                if self.limite_inferior is not None and len(solucao) <= self.limite_inferior:
+                    break
+
+        return iteracao, tempo_melhor_solucao - self.tempo_inicio, atingiu_valor_alvo, tempo_ate_alvo
+
+    def _executar_paralelo(self, l_c, a_c, max_c, itens, valor_alvo):
+        """
+        Distribui as iterações entre `self.workers` processos. Cada um recebe
+        uma semente derivada de `random_seed`, todos partilham o melhor número
+        de bins e param juntos ao atingir o alvo ou o limite de tempo.
+        """
+        rng_sementes = random.Random(self.random_seed)
+        sementes = [rng_sementes.getrandbits(32) for _ in range(self.workers)]
+        base, resto = divmod(self.iteracoes_max, self.workers)
+
+        parametros = dict(tempo_max=self.tempo_max,
+                          estrategia_construcao=self.estrategia_construcao,
+                          estrategia_busca=self.estrategia_busca,
+                          alpha=self.alpha,
+                          limite_sem_melhora=self.limite_sem_melhora,
+                          reempacotar=self.reempacotar,
+                          tamanho_cache_viabilidade=self.tamanho_cache_viabilidade,
+                          tamanho_lote=self.tamanho_lote,
+                          fracao_refinamento=self.fracao_refinamento,
+                          alpha_reativo=self.alpha_reativo,
+                          tamanho_elite=self.tamanho_elite,
+                          frequencia_relinking=self.frequencia_relinking)
+        tarefas = [(parametros, sementes[i], base + (1 if i < resto else 0),
+                    (l_c, a_c, max_c, itens), valor_alvo, self.tempo_inicio, self.limite_inferior)
+                   for i in range(self.workers)]
+
+        melhor_global = mp.Value('i', 2 ** 31 - 1)
+        parar = mp.Event()
+        with mp.Pool(self.workers, initializer=_inicializar_trabalhador,
+                     initargs=(melhor_global, parar)) as pool:
+            pendente = pool.map_async(_executar_trabalhador, tarefas)
+            # O cancelamento do chamador chega aos processos pelo evento comum.
+            while not pendente.ready():
+                pendente.wait(INTERVALO_CANCELAMENTO)
+                if self._cancelamento is not None and self._cancelamento.is_set():
+                    parar.set()
+            resultados = pendente.get()
+
+        iteracoes = sum(r[1] for r in resultados)
+        tempo_melhor_solucao = self._tempo_incumbente - self.tempo_inicio if self._tempo_incumbente else 0
+        incumbente = self.melhor_solucao
+        melhor_compacta = None
+        for solucao, _, tempo_melhor, _, _, (acertos, falhas, repetidas) in resultados:
+            self.cache_viabilidade.acertos += acertos
+            self.cache_viabilidade.falhas += falhas
+            self.iteracoes_repetidas += repetidas
+            melhor_atual = melhor_compacta if melhor_compacta is not None else self.melhor_solucao
+            if solucao is not None and (melhor_atual is None or len(solucao) < len(melhor_atual)):
+                melhor_compacta = solucao
+                tempo_melhor_solucao = tempo_melhor
+        # Os processos devolvem soluções compactas; só a melhor é remontada.
+        if melhor_compacta is not None:
+            self.melhor_solucao = melhor_compacta.containers(itens)
+        # Os processos não alcançam `ao_melhorar`: só o resultado final é entregue.
+        if self.melhor_solucao is not incumbente:
+            self._notificar(self.melhor_solucao)
+
+        tempos_alvo = [r[4] for r in resultados if r[3]]
+        atingiu_valor_alvo = bool(tempos_alvo)
+        tempo_ate_alvo = min(tempos_alvo) if tempos_alvo else 0
+        return iteracoes, tempo_melhor_solucao, atingiu_valor_alvo, tempo_ate_alvo
+
+    def executar(self, caminho_instancia, valor_alvo=0, ao_melhorar=None, cancelamento=None, usar_cache=False):
+        """
+        Executa o GRASP e retorna a melhor solução ao final. `ao_melhorar`,
+        se dada, é chamada com (solução, segundos desde o início) a cada nova
+        melhor solução; `cancelamento` (um objeto com is_set()) interrompe a
+        execução, que retorna o que já encontrou. Com `usar_cache`, a
+        instância é lida do cache binário da coleção (ver cache_instancias).
+        """
+        self.tempo_inicio = time.time()
+        self._ao_melhorar = ao_melhorar
+        self._cancelamento = cancelamento
+        self.melhor_solucao = None
+        self._tempo_incumbente = None
+        l_c, a_c, max_c, itens = carregar_instancia_json(caminho_instancia, usar_cache=usar_cache)
+        if self.parar_no_limite_inferior:
+            self.limite_inferior = calcular_lower_bound_mv(l_c, a_c, itens)
+        encerrada = None
+        if self.incumbente_heuristica:
+            encerrada = self._incumbente_inicial(l_c, a_c, max_c, itens, valor_alvo)
+        self.cache_viabilidade = CacheViabilidade(self.tamanho_cache_viabilidade)
+        self._solucoes_vistas = OrderedDict()
+        self.iteracoes_repetidas = 0
+        self._reiniciar_alphas()
+        self.elite = []
+
+        if encerrada is not None:
+            iteracao, tempo_melhor_solucao, atingiu_valor_alvo, tempo_ate_alvo = encerrada
+        elif self.workers > 1:
+            iteracao, tempo_melhor_solucao, atingiu_valor_alvo, tempo_ate_alvo = \
+                self._executar_paralelo(l_c, a_c, max_c, itens, valor_alvo)
+        else:
+            iteracao, tempo_melhor_solucao, atingiu_valor_alvo, tempo_ate_alvo = \
+                self._laco_principal(l_c, a_c, max_c, itens, valor_alvo, self.iteracoes_max)
+
+        if self.lns_bins and self.melhor_solucao is not None and not atingiu_valor_alvo:
+            tempo_lns, atingiu_lns, tempo_alvo_lns = self.busca_lns(l_c, a_c, valor_alvo)
+            if tempo_lns is not None:
+                tempo_melhor_solucao = tempo_lns
+            if atingiu_lns:
+                atingiu_valor_alvo, tempo_ate_alvo = True, tempo_alvo_lns
+
+        print(f"Iterações repetidas (busca local evitada): {self.iteracoes_repetidas} de {iteracao}")
+        cache = self.cache_viabilidade
+        if cache.acertos + cache.falhas:
+            print(f"Cache de viabilidade: {cache.acertos} acertos, {cache.falhas} falhas "
+                  f"({cache.taxa_acerto():.1%} de acerto)")
 
         if valor_alvo == 0:
-            return self.melhor_solucao, iteracao, tempo_melhor_solucao - self.tempo_inicio
+            return self.melhor_solucao, iteracao, tempo_melhor_solucao
         else:
             return self.melhor_solucao, iteracao, valor_alvo, atingiu_valor_alvo, tempo_ate_alvo
 
+    def executar_iterativo(self, caminho_instancia, valor_alvo=0):
+        """
+        Versão geradora de `executar`: produz (segundos desde o início,
+        solução) a cada nova melhor solução, enquanto a execução continua em
+        uma thread. Fechar o gerador antes do fim cancela a execução.
+        """
+        novas = queue.Queue()
+        cancelamento = threading.Event()
+        fim = object()
+        erros = []
+
+        def rodar():
+            try:
+                self.executar(caminho_instancia, valor_alvo,
+                              ao_melhorar=lambda solucao, tempo: novas.put((tempo, solucao)),
+                              cancelamento=cancelamento)
+            except BaseException as erro:
+                erros.append(erro)
+            finally:
+                novas.put(fim)
+
+        execucao = threading.Thread(target=rodar, daemon=True)
+        execucao.start()
+        try:
+            while True:
+                nova = novas.get()
+                if nova is fim:
+                    break
+                yield nova
+        finally:
+            cancelamento.set()
+            execucao.join()
+        if erros:
+            raise erros[0]
+
+
+# Estado partilhado de cada processo do pool, definido pelo inicializador.
+_estado_trabalhador = None
+
+def _inicializar_trabalhador(melhor_global, parar):
+    global _estado_trabalhador
+    _estado_trabalhador = (melhor_global, parar)
+
+def _executar_trabalhador(tarefa):
+    """Executa a parte de um processo em `GRASP._executar_paralelo`."""
+    parametros, semente, iteracoes_max, instancia, valor_alvo, tempo_inicio, limite_inferior = tarefa
+    grasp = GRASP(iteracoes_max, random_seed=semente, **parametros)
+    grasp.tempo_inicio = tempo_inicio
+    grasp.limite_inferior = limite_inferior
+    grasp._compartilhado = _estado_trabalhador
+    l_c, a_c, max_c, itens = instancia
+    iteracao, tempo_melhor, atingiu_valor_alvo, tempo_ate_alvo = \
+        grasp._laco_principal(l_c, a_c, max_c, itens, valor_alvo, iteracoes_max)
+    contagens = (grasp.cache_viabilidade.acertos, grasp.cache_viabilidade.falhas, grasp.iteracoes_repetidas)
+    # A solução volta ao processo principal na forma compacta, sem serializar
+    # containers, levels e índices de pontos de inserção.
+    solucao = Solucao.de_containers(grasp.melhor_solucao) if grasp.melhor_solucao else None
+    return solucao, iteracao, tempo_melhor, atingiu_valor_alvo, tempo_ate_alvo, contagens
 
 
 if __name__ == "__main__":
@@ -1,3 +1,122 @@
+from bisect import bisect_left, insort
+from itertools import groupby
+
+from indices import IndiceContainers, fronteira_pareto, cabe_na_fronteira
+
+# Containers abertos a partir dos quais o FFF determinístico passa a usar o
+# índice de limites livres em vez da varredura linear.
+LIMITE_CONTAINERS_INDICE = 256
+
+class IndicePontosInsercao:
+    """
+    Pontos de inserção de um ContainerFFF, ordenados por (y, x).
+
+    Cada ponto guarda a ordem de chegada dos itens que o geraram e do item
+    colocado sobre ele. O ponto existe se foi gerado depois da última ocupação,
+    exatamente como na reconstrução sequencial do container, de modo que
+    remover um item (ou desfazer a remoção) só mexe nos pontos ligados a ele.
+    Pontos cobertos por algum item não aceitam nenhum outro e ficam fora da lista.
+    """
+    def __init__(self, largura_max, altura_max):
+        self.largura_max = largura_max
+        self.altura_max = altura_max
+        self.pontos = []              # pontos ativos (x, y), ordenados por (y, x)
+        self._chaves = []             # chaves (y, x) de self.pontos, para bisect
+        self._ativos = set()
+        self._rastreados = []         # chaves (y, x) de todo ponto já gerado ou ocupado
+        self._geradores = {}
+        self._ocupante = {}
+        self._cobertura = {}
+        self._retangulos = {}         # ordem -> (x, y, largura, altura)
+        self._rastrear((0, 0))
+        self._geradores[(0, 0)].append(-1)
+        self._atualizar((0, 0))
+
+    def __len__(self):
+        return len(self.pontos)
+
+    def __contains__(self, ponto):
+        return ponto in self._ativos
+
+    def _pontos_no_retangulo(self, x, y, largura, altura):
+        i = bisect_left(self._rastreados, (y, x))
+        fim = bisect_left(self._rastreados, (y + altura, x))
+        for py, px in self._rastreados[i:fim]:
+            if x <= px < x + largura:
+                yield (px, py)
+
+    def _rastrear(self, ponto):
+        if ponto in self._geradores:
+            return
+        px, py = ponto
+        self._geradores[ponto] = []
+        self._cobertura[ponto] = sum(1 for (x, y, l, a) in self._retangulos.values()
+                                     if x <= px < x + l and y <= py < y + a)
+        insort(self._rastreados, (py, px))
+
+    def _descartar_se_vazio(self, ponto):
+        if self._geradores[ponto] or ponto in self._ocupante:
+            return
+        del self._geradores[ponto]
+        del self._cobertura[ponto]
+        self._rastreados.pop(bisect_left(self._rastreados, (ponto[1], ponto[0])))
+
+    def _atualizar(self, ponto):
+        geradores = self._geradores[ponto]
+        ativo = (bool(geradores) and max(geradores) >= self._ocupante.get(ponto, -2) and
+                 self._cobertura[ponto] == 0)
+        if ativo == (ponto in self._ativos):
+            return
+        chave = (ponto[1], ponto[0])
+        if ativo:
+            i = bisect_left(self._chaves, chave)
+            self._chaves.insert(i, chave)
+            self.pontos.insert(i, ponto)
+            self._ativos.add(ponto)
+        else:
+            i = bisect_left(self._chaves, chave)
+            self._chaves.pop(i)
+            self.pontos.pop(i)
+            self._ativos.discard(ponto)
+
+    def _pontos_gerados(self, x, y, largura, altura):
+        for ponto in ((x + largura, y), (x, y + altura)):
+            if ponto[0] < self.largura_max and ponto[1] < self.altura_max:
+                yield ponto
+
+    def adicionar(self, ordem, x, y, largura, altura):
+        """Registra o item de ordem `ordem` colocado em (x, y)."""
+        self._retangulos[ordem] = (x, y, largura, altura)
+        for ponto in list(self._pontos_no_retangulo(x, y, largura, altura)):
+            self._cobertura[ponto] += 1
+            self._atualizar(ponto)
+
+        self._rastrear((x, y))
+        self._ocupante[(x, y)] = ordem
+        self._atualizar((x, y))
+
+        for ponto in self._pontos_gerados(x, y, largura, altura):
+            self._rastrear(ponto)
+            self._geradores[ponto].append(ordem)
+            self._atualizar(ponto)
+
+    def remover(self, ordem):
+        """Desfaz o registro do item de ordem `ordem`."""
+        x, y, largura, altura = self._retangulos.pop(ordem)
+        for ponto in list(self._pontos_no_retangulo(x, y, largura, altura)):
+            self._cobertura[ponto] -= 1
+            self._atualizar(ponto)
+
+        if self._ocupante.get((x, y)) == ordem:
+            del self._ocupante[(x, y)]
+            self._atualizar((x, y))
+            self._descartar_se_vazio((x, y))
+
+        for ponto in self._pontos_gerados(x, y, largura, altura):
+            self._geradores[ponto].remove(ordem)
+            self._atualizar(ponto)
+            self._descartar_se_vazio(ponto)
+
 class ContainerFFF:
     def __init__(self, id, largura_max, altura_max):
         self.id = id
@@ -5,13 +124,82 @@ class ContainerFFF:
         self.altura_max = altura_max
         self.itens_empacotados = []
         self.posicoes_itens = []
-        self.pontos_insercao = [(0, 0)]
+        self.ordens_itens = []        # ordem de chegada de cada item, crescente
+        self.area_ocupada = 0
+        self.num_itens = 0
+        self.versao = 0               # muda a cada inserção ou remoção
+        self._ordem_por_id = {}
+        self._proxima_ordem = 0
+        self.indice_pontos = IndicePontosInsercao(largura_max, altura_max)
+        self.pontos_insercao = self.indice_pontos.pontos
+
+        # Folgas de cada ponto de inserção e os limites do container que saem
+        # delas. Uma inserção só encurta as folgas já calculadas; uma remoção
+        # descarta as que o item removido limitava, refeitas quando preciso.
+        self._folgas = None
+        self._folgas_por_ponto = {}
+        self._limites_livres = None
 
     def __repr__(self):
          return f"ContainerFFF(id={self.id}, itens={len(self.itens_empacotados)})"
 
+    def _folga_ponto(self, px, py):
+        """
+        Largura livre à direita do ponto na mesma linha e altura livre acima dele
+        na mesma coluna, até o primeiro item ou a borda. Um item só cabe no
+        ponto se não passar de nenhuma das duas.
+        """
+        limite_x = self.largura_max
+        limite_y = self.altura_max
+        for item, (ix, iy) in zip(self.itens_empacotados, self.posicoes_itens):
+            if px <= ix < limite_x and iy <= py < iy + item.altura:
+                limite_x = ix
+            if py <= iy < limite_y and ix <= px < ix + item.largura:
+                limite_y = iy
+        return (limite_x - px, limite_y - py)
+
+    def _encurtar_folgas(self, item, x, y):
+        """Ajusta as folgas já calculadas ao item novo em (x, y)."""
+        for (px, py), (folga_l, folga_a) in self._folgas_por_ponto.items():
+            if px <= x < px + folga_l and y <= py < y + item.altura:
+                folga_l = x - px
+            if py <= y < py + folga_a and x <= px < x + item.largura:
+                folga_a = y - py
+            self._folgas_por_ponto[(px, py)] = (folga_l, folga_a)
+
+    def _liberar_folgas(self, item, x, y):
+        """Descarta as folgas calculadas que terminavam no item removido de (x, y)."""
+        for (px, py), (folga_l, folga_a) in list(self._folgas_por_ponto.items()):
+            if ((px + folga_l == x and y <= py < y + item.altura) or
+                    (py + folga_a == y and x <= px < x + item.largura)):
+                del self._folgas_por_ponto[(px, py)]
+
+    def _calcular_folgas(self):
+        """Folgas dos pontos de inserção, na ordem de `pontos_insercao`."""
+        calculadas = self._folgas_por_ponto
+        folgas = [calculadas.get(ponto) or self._folga_ponto(*ponto)
+                  for ponto in self.pontos_insercao]
+        self._folgas_por_ponto = dict(zip(self.pontos_insercao, folgas))
+        return folgas
+
+    def limites_livres(self):
+        """
+        Retorna (área livre, fronteira de Pareto das folgas dos pontos de
+        inserção): um item que passe da área ou de todas as folgas não cabe.
+        """
+        if self._limites_livres is None:
+            self._folgas = self._calcular_folgas()
+            self._limites_livres = (self.largura_max * self.altura_max - self.area_ocupada,
+                                    fronteira_pareto(self._folgas))
+        return self._limites_livres
+
+    def pode_caber(self, item):
+        """Teste sem varrer os itens: False garante que o item não cabe."""
+        area, fronteira = self.limites_livres()
+        return (item.largura * item.altura <= area and
+                cabe_na_fronteira(fronteira, item.largura, item.altura))
+
     def verifica_sobreposicao(self, novo_item, x, y):
-        # (Sua implementação atual está correta, mantenha-a)
         if (x + novo_item.largura > self.largura_max) or (y + novo_item.altura > self.altura_max):
             return True
         for i, item_existente in enumerate(self.itens_empacotados):
@@ -22,68 +210,144 @@ class ContainerFFF:
                 return True
         return False
 
-    def adicionar_item(self, item, x, y):
+    def adicionar_item(self, item, x, y, ordem=None):
         """
         Adiciona um item em uma posição específica e atualiza os pontos.
-        Usado tanto para empacotamento normal quanto para reconstrução.
+        Sem `ordem`, o item entra como o último a chegar; com a ordem devolvida
+        por `obter_posicao`, desfaz exatamente uma remoção anterior.
         """
-        self.itens_empacotados.append(item)
-        self.posicoes_itens.append((x, y))
-        
-        if (x, y) in self.pontos_insercao:
-            self.pontos_insercao.remove((x, y))
-            
-        novo_ponto_direita = (x + item.largura, y)
-        novo_ponto_acima = (x, y + item.altura)
-        
-        if novo_ponto_direita not in self.pontos_insercao and \
-           novo_ponto_direita[0] < self.largura_max and \
-           novo_ponto_direita[1] < self.altura_max:
-            self.pontos_insercao.append(novo_ponto_direita)
-            
-        if novo_ponto_acima not in self.pontos_insercao and \
-           novo_ponto_acima[0] < self.largura_max and \
-           novo_ponto_acima[1] < self.altura_max:
-            self.pontos_insercao.append(novo_ponto_acima)
-            
-        self.pontos_insercao.sort(key=lambda p: (p[1], p[0])) # Ordena por Y, depois X
+        if ordem is None:
+            ordem = self._proxima_ordem
+            self._proxima_ordem += 1
+        i = bisect_left(self.ordens_itens, ordem)
+        self.itens_empacotados.insert(i, item)
+        self.posicoes_itens.insert(i, (x, y))
+        self.ordens_itens.insert(i, ordem)
+        self._ordem_por_id[item.id] = ordem
+        self.area_ocupada += item.largura * item.altura
+        self.num_itens += 1
+        self.versao += 1
+        self._encurtar_folgas(item, x, y)
+        self._limites_livres = None
+
+        self.indice_pontos.adicionar(ordem, x, y, item.largura, item.altura)
+
+    def obter_posicao(self, id_item):
+        """Retorna (x, y, ordem) do item, ou None se ele não estiver no container."""
+        ordem = self._ordem_por_id.get(id_item)
+        if ordem is None:
+            return None
+        x, y = self.posicoes_itens[bisect_left(self.ordens_itens, ordem)]
+        return (x, y, ordem)
+
+    def restaurar_item(self, item, info_posicao):
+        """Desfaz a remoção de `item` a partir do retorno de `obter_posicao`."""
+        x, y, ordem = info_posicao
+        self.adicionar_item(item, x, y, ordem)
+        return True
 
     def tentar_empacotar_item(self, item):
-        for (x, y) in self.pontos_insercao:
-            if not self.verifica_sobreposicao(item, x, y):
+        # As folgas só são usadas se alguém (o índice de containers) já pediu
+        # os limites livres; mantê-las só para este teste custa mais do que a
+        # varredura economiza.
+        if self._limites_livres is None:
+            if item.largura * item.altura > self.largura_max * self.altura_max - self.area_ocupada:
+                return False
+            for (x, y) in self.pontos_insercao:
+                if not self.verifica_sobreposicao(item, x, y):
+                    self.adicionar_item(item, x, y)
+                    return True
+            return False
+        if not self.pode_caber(item):
+            return False
+        for (x, y), (folga_l, folga_a) in zip(self.pontos_insercao, self._folgas):
+            if (item.largura <= folga_l and item.altura <= folga_a and
+                    not self.verifica_sobreposicao(item, x, y)):
                 self.adicionar_item(item, x, y)
                 return True
         return False
 
     def remover_item_pelo_id(self, id_item):
         """
-        Remove um item e reconstrói o estado do container do zero
-        para garantir que os pontos de inserção estejam corretos.
+        Remove um item e atualiza apenas os pontos de inserção ligados a ele,
+        deixando o container no mesmo estado de uma reconstrução do zero.
         """
-        encontrou = False
-        for i, item in enumerate(self.itens_empacotados):
-            if item.id == id_item:
-                self.itens_empacotados.pop(i)
-                self.posicoes_itens.pop(i)
-                encontrou = True
-                break
-        
-        if encontrou:
-            # Reconstrói o estado interno
-            itens_restantes = list(self.itens_empacotados)
-            posicoes_restantes = list(self.posicoes_itens)
-            
-            # Reseta
-            self.itens_empacotados = []
-            self.posicoes_itens = []
-            self.pontos_insercao = [(0, 0)]
-            
-            # Reinsere tudo nas mesmas posições
-            for i, item in enumerate(itens_restantes):
-                self.adicionar_item(item, posicoes_restantes[i][0], posicoes_restantes[i][1])
-            return True
-            
-        return False
+        ordem = self._ordem_por_id.pop(id_item, None)
+        if ordem is None:
+            return False
+
+        i = bisect_left(self.ordens_itens, ordem)
+        item = self.itens_empacotados.pop(i)
+        x, y = self.posicoes_itens.pop(i)
+        self.ordens_itens.pop(i)
+        self.area_ocupada -= item.largura * item.altura
+        self.num_itens -= 1
+        self.versao += 1
+        self._liberar_folgas(item, x, y)
+        self._limites_livres = None
+
+        self.indice_pontos.remover(ordem)
+        return True
+
+    def esvaziar(self):
+        """Retira todos os itens; o container continua com o mesmo id e dimensões."""
+        self.itens_empacotados = []
+        self.posicoes_itens = []
+        self.ordens_itens = []
+        self.area_ocupada = 0
+        self.num_itens = 0
+        self.versao += 1
+        self._ordem_por_id = {}
+        self._proxima_ordem = 0
+        self.indice_pontos = IndicePontosInsercao(self.largura_max, self.altura_max)
+        self.pontos_insercao = self.indice_pontos.pontos
+        self._folgas = None
+        self._folgas_por_ponto = {}
+        self._limites_livres = None
+
+    def itens(self):
+        """Itens do container, na ordem de chegada."""
+        return list(self.itens_empacotados)
+
+    def posicoes(self):
+        """Lista de (item, x, y) com o canto inferior esquerdo de cada item."""
+        return [(item, x, y) for item, (x, y) in zip(self.itens_empacotados, self.posicoes_itens)]
+
+    def arranjo(self):
+        """Disposição dos itens sem os ids: (largura, altura, x, y) na ordem de chegada."""
+        return tuple((item.largura, item.altura, x, y)
+                     for item, (x, y) in zip(self.itens_empacotados, self.posicoes_itens))
+
+    def montar_arranjo(self, itens, arranjo):
+        """
+        Substitui o conteúdo do container pela disposição de `arranjo`, com os
+        `itens` nos lugares de mesmas dimensões.
+        """
+        por_dimensao = {}
+        for item in itens:
+            por_dimensao.setdefault((item.largura, item.altura), []).append(item)
+        self.esvaziar()
+        for largura, altura, x, y in arranjo:
+            self.adicionar_item(por_dimensao[(largura, altura)].pop(), x, y)
+
+def empacotar_first_fit(containers, indice, item, inicio=0):
+    """
+    Coloca `item` no primeiro container a partir de `inicio` que o aceite,
+    testando só os que o índice de limites livres não descarta. Retorna a
+    posição do container usado, ou -1 se nenhum aceitou.
+    """
+    j = indice.proximo(inicio, item)
+    while j != -1:
+        container = containers[j]
+        if container.tentar_empacotar_item(item):
+            indice.atualizar(j, container.limites_livres())
+            return j
+        j = indice.proximo(j + 1, item)
+    return -1
+
+def tipo_do_item(item):
+    """Tipo do item na instância; itens sem tipo são agrupados pelas dimensões."""
+    return item.tipo if item.tipo is not None else (item.largura, item.altura)
 
 def heuristica_fff(l_container, a_container, max_containers, itens):
     for item in itens:
@@ -94,24 +358,46 @@ def heuristica_fff(l_container, a_container, max_containers, itens):
     itens.sort(key=lambda item: (item.altura, item.largura), reverse=True)
     
     containers_usados = []
-    
-    for i, item in enumerate(itens):
-        item_alocado = False
-        
-        for container in containers_usados:
-            if container.tentar_empacotar_item(item):
-                item_alocado = True
-                break 
-        
-        if not item_alocado:
-            if len(containers_usados) < max_containers:
-                novo_id = len(containers_usados) + 1
-                novo_container = ContainerFFF(id=novo_id, 
-                                             largura_max=l_container, 
-                                             altura_max=a_container)
-                
-                if novo_container.tentar_empacotar_item(item):
-                    containers_usados.append(novo_container)
+    # O índice de limites livres só compensa com muitos containers abertos;
+    # até lá a varredura linear é mais barata que manter a árvore e as folgas.
+    # Ele é montado quando o limite é atingido.
+    indice = None
+
+    # A ordenação deixa as unidades de cada tipo consecutivas, e elas são
+    # colocadas em sequência. Os containers que recusaram uma unidade não
+    # mudaram desde então e recusariam a seguinte, então a busca de cada
+    # unidade recomeça onde a anterior entrou.
+    for _, unidades in groupby(itens, key=tipo_do_item):
+        inicio = 0
+        for item in unidades:
+            item_alocado = False
+            if indice is None:
+                for j in range(inicio, len(containers_usados)):
+                    if containers_usados[j].tentar_empacotar_item(item):
+                        item_alocado = True
+                        inicio = j
+                        break
+            else:
+                j = empacotar_first_fit(containers_usados, indice, item, inicio)
+                if j != -1:
                     item_alocado = True
+                    inicio = j
+
+            if not item_alocado:
+                inicio = len(containers_usados)
+                if len(containers_usados) < max_containers:
+                    novo_id = len(containers_usados) + 1
+                    novo_container = ContainerFFF(id=novo_id, 
+                                                 largura_max=l_container, 
+                                                 altura_max=a_container)
+                    
+                    if novo_container.tentar_empacotar_item(item):
+                        containers_usados.append(novo_container)
+                        if indice is not None:
+                            indice.acrescentar(novo_container.limites_livres())
+                        elif len(containers_usados) >= LIMITE_CONTAINERS_INDICE:
+                            indice = IndiceContainers()
+                            for container in containers_usados:
+                                indice.acrescentar(container.limites_livres())
     
     return containers_usados
\ No newline at end of file
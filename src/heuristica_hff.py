@@ -1,3 +1,7 @@
+from bisect import bisect_left
+
+from indices import ArvoreMinimo
+
 class Level:
     def __init__(self, altura, max_largura):
         self.altura = altura
@@ -20,8 +24,8 @@ class Level:
             if item.id == id_item:
                 self.itens.pop(i)
                 self.largura_ocupada -= item.largura
-                return True
-        return False
+                return item
+        return None
 
     def __repr__(self):
         return f"Level(h={self.altura}, w_usada={self.largura_ocupada}/{self.max_largura}, itens={len(self.itens)})"
@@ -33,13 +37,20 @@ class ContainerHFF:
         self.altura_max = altura_max
         self.altura_ocupada = 0
         self.levels = []
+        self.area_ocupada = 0
+        self.num_itens = 0
+        self.versao = 0               # muda a cada inserção ou remoção
 
     def altura_disponivel(self):
         return self.altura_max - self.altura_ocupada
     
     def remover_item_pelo_id(self, id_item):
         for i, level in enumerate(self.levels):
-            if level.remover_item_pelo_id(id_item):
+            item = level.remover_item_pelo_id(id_item)
+            if item:
+                self.area_ocupada -= item.largura * item.altura
+                self.num_itens -= 1
+                self.versao += 1
                 if len(level.itens) == 0:
                     self.levels.pop(i)
                     self.altura_ocupada -= level.altura
@@ -52,19 +63,116 @@ class ContainerHFF:
         
         self.levels.append(level)
         self.altura_ocupada += level.altura
+        self.area_ocupada += sum(item.largura * item.altura for item in level.itens)
+        self.num_itens += len(level.itens)
+        self.versao += 1
         return True
-    
+
+    def tentar_empacotar_item(self, item):
+        """Coloca o item no primeiro level que o comporta ou abre um level novo."""
+        for level in self.levels:
+            if level.tentar_adicionar_item(item):
+                self.area_ocupada += item.largura * item.altura
+                self.num_itens += 1
+                self.versao += 1
+                return True
+        if item.altura <= self.altura_disponivel():
+            novo_level = Level(item.altura, self.largura_max)
+            if novo_level.tentar_adicionar_item(item):
+                return self.tentar_adicionar_level(novo_level)
+        return False
+
+    def obter_posicao(self, id_item):
+        """Retorna (índice do level, índice no level, level) do item, ou None."""
+        for i, level in enumerate(self.levels):
+            for j, item in enumerate(level.itens):
+                if item.id == id_item:
+                    return (i, j, level)
+        return None
+
+    def restaurar_item(self, item, info_posicao):
+        """
+        Desfaz a remoção mais recente de `item`, devolvendo-o ao mesmo lugar
+        do mesmo level. Um level que ficou vazio volta à sua posição original.
+        """
+        i_level, j, level = info_posicao
+        if not level.itens:
+            if level.altura > self.altura_disponivel():
+                return False
+            self.levels.insert(i_level, level)
+            self.altura_ocupada += level.altura
+        level.itens.insert(j, item)
+        level.largura_ocupada += item.largura
+        self.area_ocupada += item.largura * item.altura
+        self.num_itens += 1
+        self.versao += 1
+        return True
+
+    def esvaziar(self):
+        """Retira todos os levels; o container continua com o mesmo id e dimensões."""
+        self.levels = []
+        self.altura_ocupada = 0
+        self.area_ocupada = 0
+        self.num_itens = 0
+        self.versao += 1
+
+    def itens(self):
+        """Itens do container, level por level."""
+        return [item for level in self.levels for item in level.itens]
+
+    def posicoes(self):
+        """
+        Lista de (item, x, y) com o canto inferior esquerdo de cada item: os
+        levels são empilhados a partir da base e os itens de cada level
+        ficam lado a lado a partir da esquerda.
+        """
+        posicoes = []
+        y = 0
+        for level in self.levels:
+            x = 0
+            for item in level.itens:
+                posicoes.append((item, x, y))
+                x += item.largura
+            y += level.altura
+        return posicoes
+
+    def arranjo(self):
+        """Disposição dos itens sem os ids: (altura, ((largura, altura), ...)) por level."""
+        return tuple((level.altura, tuple((item.largura, item.altura) for item in level.itens))
+                     for level in self.levels)
+
+    def montar_arranjo(self, itens, arranjo):
+        """
+        Substitui o conteúdo do container pela disposição de `arranjo`, com os
+        `itens` nos lugares de mesmas dimensões.
+        """
+        por_dimensao = {}
+        for item in itens:
+            por_dimensao.setdefault((item.largura, item.altura), []).append(item)
+        self.esvaziar()
+        for altura, dimensoes in arranjo:
+            level = Level(altura, self.largura_max)
+            for dimensao in dimensoes:
+                level.tentar_adicionar_item(por_dimensao[dimensao].pop())
+            self.tentar_adicionar_level(level)
+
     def __repr__(self):
         return f"ContainerHFF(id={self.id}, h_usada={self.altura_ocupada}/{self.altura_max}, levels={len(self.levels)})"
 
 
 def heuristica_hff(l_container, a_container, max_containers, itens):
     itens.sort(key=lambda item: item.altura, reverse=True)
-    
-    itens_restantes = list(itens)
+
+    # Os itens ficam em posições fixas, ordenados por altura decrescente.
+    # Alturas negadas permitem achar por bisect o primeiro item que cabe na
+    # altura livre; a árvore de larguras responde "último item restante que
+    # cabe na largura residual" em O(log n), com os itens já usados removidos.
+    alturas_negadas = [-item.altura for item in itens]
+    larguras = ArvoreMinimo([item.largura for item in itens])
+    restantes = len(itens)
     containers_usados = []
 
-    while itens_restantes and len(containers_usados) < max_containers:
+    while restantes and len(containers_usados) < max_containers:
         
         novo_id = len(containers_usados) + 1
         container_atual = ContainerHFF(id=novo_id, 
@@ -74,27 +182,34 @@ def heuristica_hff(l_container, a_container, max_containers, itens):
         
         while True:
             
-            primeiro_item_idx = -1
-            for i, item in enumerate(itens_restantes):
-                if item.altura <= container_atual.altura_disponivel():
-                    primeiro_item_idx = i
-                    break
+            inicio = bisect_left(alturas_negadas, -container_atual.altura_disponivel())
+            primeiro_item_idx = larguras.primeiro_ativo(inicio)
             
             if primeiro_item_idx == -1:
                 break
                 
-            primeiro_item = itens_restantes.pop(primeiro_item_idx)
+            primeiro_item = itens[primeiro_item_idx]
+            larguras.remover(primeiro_item_idx)
+            restantes -= 1
             novo_level = Level(altura=primeiro_item.altura, max_largura=l_container)
             novo_level.tentar_adicionar_item(primeiro_item)
             
-            for i in range(len(itens_restantes) - 1, -1, -1):
-                item_candidato = itens_restantes[i]
-                
-                if novo_level.tentar_adicionar_item(item_candidato):
-                    itens_restantes.pop(i)
+            # Mesma ordem da varredura de trás para frente sobre os itens
+            # restantes: os anteriores ao primeiro são mais altos que o level,
+            # e a largura residual só diminui, então cada busca continua à
+            # esquerda do último item colocado.
+            fim = len(itens)
+            while True:
+                residual = novo_level.max_largura - novo_level.largura_ocupada
+                i = larguras.ultimo_ate(primeiro_item_idx + 1, fim, residual)
+                if i == -1:
+                    break
+                novo_level.tentar_adicionar_item(itens[i])
+                larguras.remover(i)
+                restantes -= 1
+                fim = i
 
-            if not container_atual.tentar_adicionar_level(novo_level):
-                itens_restantes.insert(primeiro_item_idx, primeiro_item) 
-                break 
+            # A altura do level cabe na altura disponível por construção.
+            container_atual.tentar_adicionar_level(novo_level)
 
-    return containers_usados
\ No newline at end of file
+    return containers_usados
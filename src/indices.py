@@ -0,0 +1,210 @@
+import sys
+
+# Valor das posições removidas: maior que qualquer dimensão de item.
+REMOVIDO = float('inf')
+_MAIOR_VALOR = sys.float_info.max
+
+class ArvoreMinimo:
+    """
+    Árvore de segmentos sobre posições fixas (por exemplo, itens ordenados por
+    altura) que guarda o menor valor de cada intervalo. Posições removidas
+    passam a valer REMOVIDO, e as consultas encontram em O(log n) a primeira
+    ou a última posição de um intervalo com valor <= limite.
+    """
+    def __init__(self, valores):
+        self.n = len(valores)
+        self.tam = 1
+        while self.tam < self.n:
+            self.tam *= 2
+        self.arvore = [REMOVIDO] * (2 * self.tam)
+        self.arvore[self.tam:self.tam + self.n] = valores
+        for i in range(self.tam - 1, 0, -1):
+            self.arvore[i] = min(self.arvore[2 * i], self.arvore[2 * i + 1])
+
+    def remover(self, pos):
+        i = pos + self.tam
+        self.arvore[i] = REMOVIDO
+        i //= 2
+        while i:
+            self.arvore[i] = min(self.arvore[2 * i], self.arvore[2 * i + 1])
+            i //= 2
+
+    def ativo(self, pos):
+        return self.arvore[pos + self.tam] != REMOVIDO
+
+    def _primeiro(self, no, esq, dir, inicio, fim, limite):
+        if dir <= inicio or esq >= fim or self.arvore[no] > limite:
+            return -1
+        if dir - esq == 1:
+            return esq
+        meio = (esq + dir) // 2
+        pos = self._primeiro(2 * no, esq, meio, inicio, fim, limite)
+        if pos != -1:
+            return pos
+        return self._primeiro(2 * no + 1, meio, dir, inicio, fim, limite)
+
+    def _ultimo(self, no, esq, dir, inicio, fim, limite):
+        if dir <= inicio or esq >= fim or self.arvore[no] > limite:
+            return -1
+        if dir - esq == 1:
+            return esq
+        meio = (esq + dir) // 2
+        pos = self._ultimo(2 * no + 1, meio, dir, inicio, fim, limite)
+        if pos != -1:
+            return pos
+        return self._ultimo(2 * no, esq, meio, inicio, fim, limite)
+
+    def primeiro_ate(self, inicio, fim, limite):
+        """Menor posição em [inicio, fim) com valor <= limite, ou -1."""
+        return self._primeiro(1, 0, self.tam, inicio, fim, limite)
+
+    def ultimo_ate(self, inicio, fim, limite):
+        """Maior posição em [inicio, fim) com valor <= limite, ou -1."""
+        return self._ultimo(1, 0, self.tam, inicio, fim, limite)
+
+    def primeiro_ativo(self, inicio, fim=None):
+        """Menor posição não removida em [inicio, fim), ou -1."""
+        return self.primeiro_ate(inicio, self.n if fim is None else fim, _MAIOR_VALOR)
+
+class ArvoreContagem:
+    """
+    Árvore de Fenwick sobre posições fixas que conta as posições ainda ativas.
+    Todas começam ativas; remover, contar um prefixo e achar a k-ésima posição
+    ativa custam O(log n).
+    """
+    def __init__(self, n):
+        self.n = n
+        self.total = n
+        # Árvore de Fenwick (1-indexada) de um vetor de uns, montada em O(n).
+        self.arvore = [0] + [1] * n
+        for i in range(1, n + 1):
+            pai = i + (i & -i)
+            if pai <= n:
+                self.arvore[pai] += self.arvore[i]
+        self._passo_inicial = 1 << (n.bit_length() - 1) if n else 0
+
+    def remover(self, pos):
+        self.total -= 1
+        i = pos + 1
+        while i <= self.n:
+            self.arvore[i] -= 1
+            i += i & -i
+
+    def contar_ate(self, fim):
+        """Número de posições ativas em [0, fim)."""
+        soma = 0
+        i = fim
+        while i > 0:
+            soma += self.arvore[i]
+            i -= i & -i
+        return soma
+
+    def kesima(self, k):
+        """Posição da k-ésima posição ativa (k a partir de 0)."""
+        pos = 0
+        passo = self._passo_inicial
+        while passo:
+            proximo = pos + passo
+            if proximo <= self.n and self.arvore[proximo] <= k:
+                pos = proximo
+                k -= self.arvore[proximo]
+            passo //= 2
+        return pos
+
+def fronteira_pareto(folgas):
+    """
+    Pares (largura, altura) não dominados de `folgas`, por largura decrescente
+    (e portanto altura crescente).
+    """
+    fronteira = []
+    for largura, altura in sorted(folgas, reverse=True):
+        if not fronteira or altura > fronteira[-1][1]:
+            fronteira.append((largura, altura))
+    return fronteira
+
+def cabe_na_fronteira(fronteira, largura, altura):
+    """Indica se algum par da fronteira comporta um retângulo largura x altura."""
+    maior_altura = -1
+    for l, a in fronteira:
+        if l < largura:
+            break
+        maior_altura = a
+    return maior_altura >= altura
+
+class IndiceContainers:
+    """
+    Limites livres dos containers abertos, na ordem de abertura: a área livre e
+    a fronteira de Pareto das folgas (largura, altura) dos pontos de inserção.
+    Cada nó da árvore de segmentos guarda a maior área e a fronteira da união
+    dos seus containers, então `proximo` desce direto ao primeiro container a
+    partir de uma posição que pode comportar o item; a ordem do first-fit é
+    preservada.
+    """
+    def __init__(self):
+        self.n = 0
+        self.tam = 1
+        self.areas = [-1] * 2
+        self.fronteiras = [[]] * 2
+
+    def __len__(self):
+        return self.n
+
+    def _recalcular(self, i):
+        """Refaz o nó `i` a partir dos filhos e indica se ele mudou."""
+        e, d = 2 * i, 2 * i + 1
+        area = max(self.areas[e], self.areas[d])
+        fronteira = fronteira_pareto(self.fronteiras[e] + self.fronteiras[d])
+        if area == self.areas[i] and fronteira == self.fronteiras[i]:
+            return False
+        self.areas[i] = area
+        self.fronteiras[i] = fronteira
+        return True
+
+    def _crescer(self):
+        folhas = [(self.areas[i], self.fronteiras[i]) for i in range(self.tam, self.tam + self.n)]
+        self.tam *= 2
+        self.areas = [-1] * (2 * self.tam)
+        self.fronteiras = [[]] * (2 * self.tam)
+        for pos, (area, fronteira) in enumerate(folhas):
+            self.areas[pos + self.tam] = area
+            self.fronteiras[pos + self.tam] = fronteira
+        for i in range(self.tam - 1, 0, -1):
+            self._recalcular(i)
+
+    def acrescentar(self, limites):
+        """Registra um novo container no fim da ordem."""
+        if self.n == self.tam:
+            self._crescer()
+        self.n += 1
+        self.atualizar(self.n - 1, limites)
+
+    def atualizar(self, pos, limites):
+        """Troca os limites (área livre, fronteira) do container na posição `pos`."""
+        i = pos + self.tam
+        self.areas[i], self.fronteiras[i] = limites
+        i //= 2
+        # Um nó que não mudou não altera os ancestrais.
+        while i and self._recalcular(i):
+            i //= 2
+
+    def _proximo(self, no, esq, dir, inicio, area, largura, altura):
+        if (dir <= inicio or self.areas[no] < area or
+                not cabe_na_fronteira(self.fronteiras[no], largura, altura)):
+            return -1
+        if dir - esq == 1:
+            return esq
+        meio = (esq + dir) // 2
+        pos = self._proximo(2 * no, esq, meio, inicio, area, largura, altura)
+        if pos != -1:
+            return pos
+        return self._proximo(2 * no + 1, meio, dir, inicio, area, largura, altura)
+
+    def proximo(self, inicio, item):
+        """Menor posição >= inicio cujo container pode comportar `item`, ou -1."""
+        area = item.largura * item.altura
+        # Caso mais comum no first-fit: o próprio container de `inicio` serve.
+        folha = inicio + self.tam
+        if (inicio < self.n and self.areas[folha] >= area and
+                cabe_na_fronteira(self.fronteiras[folha], item.largura, item.altura)):
+            return inicio
+        return self._proximo(1, 0, self.tam, inicio, area, item.largura, item.altura)
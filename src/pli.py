@@ -1,9 +1,15 @@
-import gurobipy as gp
-from gurobipy import GRB
+import math
+import os
 import time
 import csv
+import tracemalloc
+import multiprocessing as mp
+
+import numpy as np
 
 from carrega_json import carregar_instancia_json
+from heuristica_fff import heuristica_fff
+from heuristica_hff import heuristica_hff
 
 
 def inicializar_csv(nome_arquivo, cabecalho):
@@ -19,80 +25,215 @@ def salvar_linha_csv(nome_arquivo, dados_dict, cabecalho):
         writer.writerow(dados_dict)
 
 
-def resolver_pli(instance_name, time_limit=600):
+def itens_cabem(l_container, a_container, itens):
+    """Indica se cada item, sozinho, cabe no container (sem rotação)."""
+    return all(item.largura <= l_container and item.altura <= a_container for item in itens)
+
+def solucao_heuristica(l_container, a_container, max_containers, itens):
     """
-    Resolve a instância 2D-BPP, imprime o log e retorna um dicionário de resultados.
+    Melhor empacotamento (menos containers) entre o FFF e o HFF
+    determinísticos, ou None se nenhum dos dois coube no limite de containers.
+    Os itens precisam caber individualmente no container (ver `itens_cabem`).
     """
-    
-    result = {
-        "Instancia": instance_name,
-        "Status": "Erro_Carregamento",
-        "Bins_Usados": "N/A",
-        "Lower_Bound": "N/A",
-        "Tempo(s)": 0.0
-    }
-    
+    candidatas = [heuristica_fff(l_container, a_container, max_containers, list(itens)),
+                  heuristica_hff(l_container, a_container, max_containers, list(itens))]
+    completas = [c for c in candidatas
+                 if c is not None and sum(container.num_itens for container in c) == len(itens)]
+    return min(completas, key=len, default=None)
+
+def valores_iniciais(solucao, indice_por_id):
+    """
+    Converte um empacotamento em (container de cada item, posição de cada
+    item), indexados pelo índice do item no modelo. Os containers são
+    renumerados pela ordem do menor índice de item que contêm: assim todo
+    item i fica em um container <= i e os usados são os primeiros, como
+    exigem as restrições de quebra de simetria.
+    """
+    posicoes_por_bin = [[(indice_por_id[item.id], x, y) for item, x, y in container.posicoes()]
+                        for container in solucao]
+    posicoes_por_bin.sort(key=lambda posicoes: min(i for i, _, _ in posicoes))
+    bin_de = {}
+    posicao_de = {}
+    for j, posicoes in enumerate(posicoes_por_bin):
+        for i, x, y in posicoes:
+            bin_de[i] = j
+            posicao_de[i] = (x, y)
+    return bin_de, posicao_de
+
+def expandir(contagens):
+    """
+    Para contagens c_0, c_1, ..., devolve (dono, j): o índice t aparece c_t
+    vezes em `dono` e `j` enumera 0..c_t-1 dentro de cada bloco.
+    """
+    dono = np.repeat(np.arange(len(contagens)), contagens)
+    inicio = np.cumsum(contagens) - contagens
+    return dono, np.arange(len(dono)) - inicio[dono]
+
+def indices_modelo(n, m_bins):
+    """
+    Índices vetorizados do modelo, com o item i restrito aos containers
+    0..i. Retorna:
+      - (ij_i, ij_j): item e container de cada par (item, container),
+        agrupados por item;
+      - inicio: posição do primeiro par de cada item nesses vetores;
+      - (pj_i, pj_k, pj_j): cada par de itens i < k e container j <= i.
+    """
+    bins_por_item = np.minimum(np.arange(n) + 1, m_bins)
+    ij_i, ij_j = expandir(bins_por_item)
+    inicio = np.cumsum(bins_por_item) - bins_por_item
+    pares_i, pares_k = np.triu_indices(n, 1)
+    par, pj_j = expandir(bins_por_item[pares_i])
+    return (ij_i, ij_j), inicio, (pares_i[par], pares_k[par], pj_j)
+
+def vetores_iniciais(n, m_bins, w, h, indices, bin_de, posicao_de):
+    """
+    Valores iniciais das variáveis do modelo MIP (mesma ordem de
+    `indices_modelo`) para o empacotamento dado por `bin_de`/`posicao_de`:
+    (y, x, px, py, (a_ik, a_ki, b_ik, b_ki)). Cada par de itens no mesmo
+    container recebe uma única relação verdadeira, tirada das coordenadas.
+    """
+    (ij_i, ij_j), _, (pj_i, pj_k, pj_j) = indices
+    bin_item = np.array([bin_de[i] for i in range(n)])
+    x0 = np.array([posicao_de[i][0] for i in range(n)])
+    y0 = np.array([posicao_de[i][1] for i in range(n)])
+    no_bin = bin_item[ij_i] == ij_j
+    livre = (bin_item[pj_i] == pj_j) & (bin_item[pj_k] == pj_j)
+    relacoes = []
+    for relacao in (x0[pj_i] + w[pj_i] <= x0[pj_k],
+                    x0[pj_k] + w[pj_k] <= x0[pj_i],
+                    y0[pj_i] + h[pj_i] <= y0[pj_k],
+                    y0[pj_k] + h[pj_k] <= y0[pj_i]):
+        escolhida = livre & relacao
+        relacoes.append(escolhida.astype(float))
+        livre &= ~escolhida
+    return (np.ones(m_bins), no_bin.astype(float),
+            np.where(no_bin, x0[ij_i], 0), np.where(no_bin, y0[ij_i], 0), tuple(relacoes))
+
+def linhas(colunas, coeficientes):
+    """
+    Bloco de linhas em formato CSR com o mesmo número de termos por linha:
+    a linha r tem os termos coeficientes[t][r] * colunas[t][r]. Coeficientes
+    escalares valem para todas as linhas.
+    """
+    num_linhas = len(colunas[0])
+    indices = np.column_stack(colunas).ravel()
+    valores = np.column_stack([np.broadcast_to(np.asarray(c, dtype=float), (num_linhas,))
+                               for c in coeficientes]).ravel()
+    inicios = np.arange(num_linhas) * len(colunas)
+    return num_linhas, inicios, indices, valores
+
+def construir_medindo(construir, result, descartar=None):
+    """
+    Constrói o modelo com `construir()` duas vezes e grava em `result` o
+    tempo e o pico de memória (Python) da construção. A primeira passada,
+    com tracemalloc, só mede a memória e é descartada (com `descartar`, se
+    dada): o rastreamento deixa a construção várias vezes mais lenta. A
+    segunda, sem rastreamento, é a cronometrada e a devolvida.
+    """
+    tracemalloc.start()
     try:
-        l_container, a_container, _, itens = carregar_instancia_json(instance_name)
-    except FileNotFoundError:
-        print(f"Erro: Arquivo '{instance_name}' não encontrado.")
-        result["Status"] = "Erro_Arquivo_Nao_Encontrado"
-        return result
-    except Exception as e:
-        print(f"Erro ao carregar instância: {e}")
-        return result
+        modelo = construir()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    if descartar is not None:
+        descartar(modelo)
+    del modelo
+
+    inicio = time.perf_counter()
+    modelo = construir()
+    tempo = time.perf_counter() - inicio
+    result["Tempo_Construcao(s)"] = f"{tempo:.2f}"
+    result["Memoria_Construcao(MB)"] = f"{pico / 2**20:.1f}"
+    print(f"Modelo construído em {tempo:.2f}s (pico de memória Python: {pico / 2**20:.1f} MB)")
+    return modelo
+
+def threads_padrao():
+    """
+    Workers do CP-SAT quando `threads` é 0: todos os núcleos, ou 1 dentro de
+    um processo filho (pool de experimentos ou do GRASP), onde outros
+    processos já ocupam os demais núcleos.
+    """
+    return 1 if mp.parent_process() is not None else (os.cpu_count() or 1)
+
+def resolver_gurobi(itens, W, H, m_bins, inicial, time_limit, threads, result):
+    """Formulação MIP com posições contínuas e big-M, resolvida pelo Gurobi."""
+    import gurobipy as gp
+    from gurobipy import GRB
 
     n = len(itens)
-    m_bins = n 
-    I = range(n) 
-    J = range(m_bins)
-    P = [(i, k) for i in I for k in I if i < k]
-    w = [item.largura for item in itens]
-    h = [item.altura for item in itens]
-    W = l_container
-    H = a_container
+    w = np.array([item.largura for item in itens])
+    h = np.array([item.altura for item in itens])
     M = max(W, H)
-    
-    print(f"\nIniciando Gurobi para instância: {instance_name}")
-    print(f"Itens: {n}, Bins disponíveis (m): {m_bins}, Dimensões: {W}x{H}")
-    
+
+    # Um ambiente por instância: o MaxMemUsed do Gurobi conta desde o início
+    # do ambiente, então só assim ele mede o pico desta instância.
+    env = None
+    m = None
     try:
-        m = gp.Model("2D_BPP_PLI")
-        
-        # Variáveis
-        y = m.addVars(J, vtype=GRB.BINARY, name="y")
-        x = m.addVars(I, J, vtype=GRB.BINARY, name="x")
-        px = m.addVars(I, J, vtype=GRB.CONTINUOUS, lb=0, name="px")
-        py = m.addVars(I, J, vtype=GRB.CONTINUOUS, lb=0, name="py")
-        a_ik = m.addVars(P, J, vtype=GRB.BINARY, name="i_left_k")
-        a_ki = m.addVars(P, J, vtype=GRB.BINARY, name="k_left_i")
-        b_ik = m.addVars(P, J, vtype=GRB.BINARY, name="i_below_k")
-        b_ki = m.addVars(P, J, vtype=GRB.BINARY, name="k_below_i")
-
-        # Restrições
-        m.addConstrs((x.sum(i, '*') == 1 for i in I), name="alocacao_unica")
-        m.addConstrs((px[i, j] + w[i] <= W + M * (1 - x[i, j]) for i in I for j in J), name="limite_X")
-        m.addConstrs((py[i, j] + h[i] <= H + M * (1 - x[i, j]) for i in I for j in J), name="limite_Y")
-        for i, k in P:
-            for j in J:
-                m.addConstr(px[i, j] + w[i] <= px[k, j] + M * (1 - a_ik[i, k, j]), name=f"i{i}_left_k{k}_j{j}")
-                m.addConstr(px[k, j] + w[k] <= px[i, j] + M * (1 - a_ki[i, k, j]), name=f"k{k}_left_i{i}_j{j}")
-                m.addConstr(py[i, j] + h[i] <= py[k, j] + M * (1 - b_ik[i, k, j]), name=f"i{i}_below_k{k}_j{j}")
-                m.addConstr(py[k, j] + h[k] <= py[i, j] + M * (1 - b_ki[i, k, j]), name=f"k{k}_below_i{i}_j{j}")
-        m.addConstrs((a_ik[i, k, j] + a_ki[i, k, j] + b_ik[i, k, j] + b_ki[i, k, j] >= x[i, j] + x[k, j] - 1 
-                      for i, k in P for j in J), name="logica_OR")
-        m.addConstrs((x[i, j] <= y[j] for i in I for j in J), name="link_x_y")
-
-        # Objetivo
-        m.setObjective(y.sum(), GRB.MINIMIZE)
-        m.setParam('TimeLimit', time_limit)
-        
+        env = gp.Env()
+
+        def construir():
+            # Construção do modelo em blocos (API matricial): um addConstr por
+            # família de restrições em vez de um por (par, container).
+            m = gp.Model("2D_BPP_PLI", env=env)
+            indices = indices_modelo(n, m_bins)
+            (ij_i, ij_j), inicio_item, (pj_i, pj_k, pj_j) = indices
+            # Posição de x/px/py de (item, container) nos vetores de pares (i, j).
+            pos_i = inicio_item[pj_i] + pj_j
+            pos_k = inicio_item[pj_k] + pj_j
+
+            # Variáveis
+            y = m.addMVar(m_bins, vtype=GRB.BINARY, name="y")
+            x = m.addMVar(len(ij_i), vtype=GRB.BINARY, name="x")
+            px = m.addMVar(len(ij_i), vtype=GRB.CONTINUOUS, lb=0, name="px")
+            py = m.addMVar(len(ij_i), vtype=GRB.CONTINUOUS, lb=0, name="py")
+            a_ik = m.addMVar(len(pj_i), vtype=GRB.BINARY, name="i_left_k")
+            a_ki = m.addMVar(len(pj_i), vtype=GRB.BINARY, name="k_left_i")
+            b_ik = m.addMVar(len(pj_i), vtype=GRB.BINARY, name="i_below_k")
+            b_ki = m.addMVar(len(pj_i), vtype=GRB.BINARY, name="k_below_i")
+
+            # Restrições
+            for i in range(n):
+                m.addConstr(x[inicio_item[i]:inicio_item[i] + min(i + 1, m_bins)].sum() == 1, name=f"alocacao_unica[{i}]")
+            m.addConstr(px + w[ij_i] + M * x <= W + M, name="limite_X")
+            m.addConstr(py + h[ij_i] + M * x <= H + M, name="limite_Y")
+            m.addConstr(px[pos_i] + w[pj_i] + M * a_ik <= px[pos_k] + M, name="i_left_k")
+            m.addConstr(px[pos_k] + w[pj_k] + M * a_ki <= px[pos_i] + M, name="k_left_i")
+            m.addConstr(py[pos_i] + h[pj_i] + M * b_ik <= py[pos_k] + M, name="i_below_k")
+            m.addConstr(py[pos_k] + h[pj_k] + M * b_ki <= py[pos_i] + M, name="k_below_i")
+            m.addConstr(a_ik + a_ki + b_ik + b_ki - x[pos_i] - x[pos_k] >= -1, name="logica_OR")
+            m.addConstr(x <= y[ij_j], name="link_x_y")
+
+            # Quebra de simetria: containers usados em ordem (o item i só tem
+            # variáveis nos containers <= i).
+            if m_bins > 1:
+                m.addConstr(y[:-1] >= y[1:], name="ordem_bins")
+
+            # Solução inicial: a heurística vira o primeiro incumbente do Gurobi.
+            if inicial:
+                y0, x0, px0, py0, relacoes0 = vetores_iniciais(n, m_bins, w, h, indices, *inicial)
+                y.Start, x.Start, px.Start, py.Start = y0, x0, px0, py0
+                for variaveis, valores in zip((a_ik, a_ki, b_ik, b_ki), relacoes0):
+                    variaveis.Start = valores
+
+            # Objetivo
+            m.setObjective(y.sum(), GRB.MINIMIZE)
+            m.setParam('TimeLimit', time_limit)
+            m.setParam('Threads', threads)
+            m.update()
+            return m
+
+        m = construir_medindo(construir, result, descartar=lambda modelo: modelo.dispose())
+        print(f"Variáveis: {m.NumVars}, restrições: {m.NumConstrs}")
+
         # Otimiza
         start_time = time.time()
         m.optimize()
         end_time = time.time()
         
         result["Tempo(s)"] = f"{end_time - start_time:.2f}" # Usamos tempo real
+        result["Memoria_Gurobi(MB)"] = f"{m.MaxMemUsed * 1024:.1f}"
 
         # Coleta de resultados
         if m.Status == GRB.OPTIMAL:
@@ -113,19 +254,315 @@ def resolver_pli(instance_name, time_limit=600):
         else:
              result["Status"] = f"Gurobi_Status_{m.Status}"
 
+    except gp.GurobiError as e:
+        print(f"Erro do Gurobi: {e.errno}: {e}")
+        result["Status"] = f"Erro_Gurobi_{e.errno}"
+    finally:
+        if m is not None:
+            m.dispose()
+        if env is not None:
+            env.dispose()
+
+def resolver_highs(itens, W, H, m_bins, inicial, time_limit, threads, result):
+    """
+    Mesma formulação MIP do Gurobi, resolvida pelo HiGHS. As colunas são
+    (y, x, px, py, a_ik, a_ki, b_ik, b_ki), cada bloco na ordem de
+    `indices_modelo`, e cada família de restrições entra com um addRows.
+    """
+    import highspy
+
+    n = len(itens)
+    w = np.array([item.largura for item in itens])
+    h = np.array([item.altura for item in itens])
+    M = max(W, H)
+    inf = highspy.kHighsInf
+
+    def construir():
+        highs = highspy.Highs()
+        indices = indices_modelo(n, m_bins)
+        (ij_i, ij_j), inicio_item, (pj_i, pj_k, pj_j) = indices
+        n_ij, n_pj = len(ij_i), len(pj_i)
+
+        # Início de cada bloco de colunas.
+        col_y = 0
+        col_x = col_y + m_bins
+        col_px = col_x + n_ij
+        col_py = col_px + n_ij
+        col_a_ik = col_py + n_ij
+        col_a_ki = col_a_ik + n_pj
+        col_b_ik = col_a_ki + n_pj
+        col_b_ki = col_b_ik + n_pj
+        num_colunas = col_b_ki + n_pj
+        pos_i = inicio_item[pj_i] + pj_j
+        pos_k = inicio_item[pj_k] + pj_j
+        pares_ij = np.arange(n_ij)
+        pares_pj = np.arange(n_pj)
+
+        # Variáveis: binárias com limites [0, 1]; px e py só limitadas por baixo.
+        superior = np.ones(num_colunas)
+        superior[col_px:col_a_ik] = inf
+        highs.addVars(num_colunas, np.zeros(num_colunas), superior)
+        binarias = np.r_[col_y:col_px, col_a_ik:num_colunas].astype(np.int32)
+        highs.changeColsIntegrality(len(binarias), binarias,
+                                    np.full(len(binarias), highspy.HighsVarType.kInteger))
+        highs.changeColsCost(m_bins, np.arange(m_bins, dtype=np.int32), np.ones(m_bins))
+
+        def adicionar(bloco, inferior, superior):
+            num_linhas, inicios, indices_cols, valores = bloco
+            highs.addRows(num_linhas, np.broadcast_to(np.asarray(inferior, dtype=float), (num_linhas,)),
+                          np.broadcast_to(np.asarray(superior, dtype=float), (num_linhas,)),
+                          len(indices_cols), inicios.astype(np.int32), indices_cols.astype(np.int32), valores)
+
+        # alocacao_unica: os x de cada item são contíguos.
+        highs.addRows(n, np.ones(n), np.ones(n), n_ij, inicio_item.astype(np.int32),
+                      (col_x + pares_ij).astype(np.int32), np.ones(n_ij))
+        # limite_X / limite_Y: px + M x <= W + M - w
+        adicionar(linhas([col_px + pares_ij, col_x + pares_ij], [1, M]), -inf, W + M - w[ij_i])
+        adicionar(linhas([col_py + pares_ij, col_x + pares_ij], [1, M]), -inf, H + M - h[ij_i])
+        # Não sobreposição: px_i - px_k + M a_ik <= M - w_i (e as outras três).
+        adicionar(linhas([col_px + pos_i, col_px + pos_k, col_a_ik + pares_pj], [1, -1, M]), -inf, M - w[pj_i])
+        adicionar(linhas([col_px + pos_k, col_px + pos_i, col_a_ki + pares_pj], [1, -1, M]), -inf, M - w[pj_k])
+        adicionar(linhas([col_py + pos_i, col_py + pos_k, col_b_ik + pares_pj], [1, -1, M]), -inf, M - h[pj_i])
+        adicionar(linhas([col_py + pos_k, col_py + pos_i, col_b_ki + pares_pj], [1, -1, M]), -inf, M - h[pj_k])
+        # logica_OR
+        adicionar(linhas([col_a_ik + pares_pj, col_a_ki + pares_pj, col_b_ik + pares_pj, col_b_ki + pares_pj,
+                          col_x + pos_i, col_x + pos_k], [1, 1, 1, 1, -1, -1]), -1, inf)
+        # link_x_y
+        adicionar(linhas([col_x + pares_ij, col_y + ij_j], [1, -1]), -inf, 0)
+        # ordem_bins
+        if m_bins > 1:
+            adicionar(linhas([np.arange(m_bins - 1), np.arange(1, m_bins)], [1, -1]), 0, inf)
+
+        if inicial:
+            y0, x0, px0, py0, relacoes0 = vetores_iniciais(n, m_bins, w, h, indices, *inicial)
+            solucao = highspy.HighsSolution()
+            solucao.col_value = np.concatenate((y0, x0, px0, py0) + relacoes0).tolist()
+            highs.setSolution(solucao)
+
+        highs.setOptionValue("time_limit", float(time_limit))
+        if threads:
+            highs.setOptionValue("threads", threads)
+        return highs
+
+    highs = construir_medindo(construir, result)
+    print(f"Variáveis: {highs.getNumCol()}, restrições: {highs.getNumRow()}")
+
+    start_time = time.time()
+    highs.run()
+    end_time = time.time()
+    result["Tempo(s)"] = f"{end_time - start_time:.2f}"
+
+    status = highs.getModelStatus()
+    info = highs.getInfo()
+    tem_solucao = info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible
+    if status == highspy.HighsModelStatus.kOptimal:
+        result["Status"] = "Otimo"
+    elif status == highspy.HighsModelStatus.kTimeLimit:
+        result["Status"] = "Limite_Tempo" if tem_solucao else "Limite_Tempo_Sem_Sol"
+    elif status == highspy.HighsModelStatus.kInfeasible:
+        result["Status"] = "Inviavel"
+    else:
+        result["Status"] = f"HiGHS_Status_{highs.modelStatusToString(status)}"
+    if tem_solucao:
+        result["Bins_Usados"] = round(info.objective_function_value)
+        result["Lower_Bound"] = math.ceil(info.mip_dual_bound - 1e-6)
+
+def modelo_cpsat(cp_model, itens, W, H, m_bins):
+    """
+    Modelo de programação por restrições do OR-Tools, sem objetivo: cada
+    item tem uma posição (x, y) inteira e, em cada container permitido, um
+    par de intervalos opcionais presentes só se o item estiver lá; um
+    NoOverlap2D por container impede sobreposição. Retorna (modelo,
+    containers usados, presença x[i, j], px, py).
+    """
+    n = len(itens)
+    modelo = cp_model.CpModel()
+    usado = [modelo.NewBoolVar(f"y[{j}]") for j in range(m_bins)]
+    px = [modelo.NewIntVar(0, W - item.largura, f"px[{i}]") for i, item in enumerate(itens)]
+    py = [modelo.NewIntVar(0, H - item.altura, f"py[{i}]") for i, item in enumerate(itens)]
+    # Mesma quebra de simetria do MIP: o item i só vai para os containers 0..i.
+    x = {(i, j): modelo.NewBoolVar(f"x[{i},{j}]") for i in range(n) for j in range(min(i + 1, m_bins))}
+    intervalos_x = [[] for _ in range(m_bins)]
+    intervalos_y = [[] for _ in range(m_bins)]
+    area = [[] for _ in range(m_bins)]
+    for (i, j), presente in x.items():
+        item = itens[i]
+        intervalos_x[j].append(modelo.NewOptionalFixedSizeIntervalVar(px[i], item.largura, presente, f"ix[{i},{j}]"))
+        intervalos_y[j].append(modelo.NewOptionalFixedSizeIntervalVar(py[i], item.altura, presente, f"iy[{i},{j}]"))
+        area[j].append(item.largura * item.altura * presente)
+        modelo.AddImplication(presente, usado[j])
+    for i in range(n):
+        modelo.AddExactlyOne(x[i, j] for j in range(min(i + 1, m_bins)))
+    for j in range(m_bins):
+        modelo.AddNoOverlap2D(intervalos_x[j], intervalos_y[j])
+        # Redundante, mas dá ao CP-SAT o limitante de área por container.
+        modelo.Add(sum(area[j]) <= W * H * usado[j])
+    for j in range(m_bins - 1):
+        modelo.AddImplication(usado[j + 1], usado[j])
+    return modelo, usado, x, px, py
+
+def resolver_cpsat(itens, W, H, m_bins, inicial, time_limit, threads, result):
+    """
+    Modelo de `modelo_cpsat` minimizando os containers usados, resolvido
+    pelo CP-SAT com `threads` workers (0 = `threads_padrao()`).
+    """
+    from ortools.sat.python import cp_model
+
+    n = len(itens)
+
+    def construir():
+        modelo, usado, x, px, py = modelo_cpsat(cp_model, itens, W, H, m_bins)
+        modelo.Minimize(sum(usado))
+
+        if inicial:
+            bin_de, posicao_de = inicial
+            for j in range(m_bins):
+                modelo.AddHint(usado[j], 1)
+            for (i, j), presente in x.items():
+                modelo.AddHint(presente, int(bin_de[i] == j))
+            for i in range(n):
+                modelo.AddHint(px[i], posicao_de[i][0])
+                modelo.AddHint(py[i], posicao_de[i][1])
+        return modelo
+
+    modelo = construir_medindo(construir, result)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_workers = threads or threads_padrao()
+    solver.parameters.log_search_progress = True
+
+    start_time = time.time()
+    status = solver.Solve(modelo)
+    end_time = time.time()
+    result["Tempo(s)"] = f"{end_time - start_time:.2f}"
+
+    if status == cp_model.OPTIMAL:
+        result["Status"] = "Otimo"
+    elif status == cp_model.FEASIBLE:
+        result["Status"] = "Limite_Tempo"
+    elif status == cp_model.INFEASIBLE:
+        result["Status"] = "Inviavel"
+    elif status == cp_model.UNKNOWN:
+        result["Status"] = "Limite_Tempo_Sem_Sol"
+    else:
+        result["Status"] = f"CPSAT_Status_{solver.StatusName(status)}"
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        result["Bins_Usados"] = round(solver.ObjectiveValue())
+        result["Lower_Bound"] = math.ceil(solver.BestObjectiveBound() - 1e-6)
+
+def empacotar_exato(itens, W, H, num_bins, time_limit, threads=0):
+    """
+    Tenta empacotar `itens` em até `num_bins` containers W x H com o modelo
+    do CP-SAT, parando no primeiro empacotamento encontrado. Retorna a lista
+    de (item, x, y) de cada container usado, ou None se o resolvedor provou
+    que não cabem ou não achou empacotamento dentro de `time_limit`.
+    """
+    from ortools.sat.python import cp_model
+
+    itens = sorted(itens, key=lambda item: item.largura * item.altura, reverse=True)
+    modelo, _, x, px, py = modelo_cpsat(cp_model, itens, W, H, num_bins)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_workers = threads or threads_padrao()
+    status = solver.Solve(modelo)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+
+    bins = [[] for _ in range(num_bins)]
+    for (i, j), presente in x.items():
+        if solver.Value(presente):
+            bins[j].append((itens[i], solver.Value(px[i]), solver.Value(py[i])))
+    return [posicoes for posicoes in bins if posicoes]
+
+BACKENDS_PLI = {
+    "gurobi": resolver_gurobi,
+    "highs": resolver_highs,
+    "cpsat": resolver_cpsat,
+}
+
+def resolver_pli(instance_name, time_limit=600, solucao_inicial=None, backend="gurobi", threads=0):
+    """
+    Resolve a instância 2D-BPP, imprime o log e retorna um dicionário de resultados.
+
+    O número de containers do modelo é limitado pelo de `solucao_inicial`
+    (por padrão, o melhor entre FFF e HFF), que também é passada ao
+    resolvedor como solução inicial (MIP start / dica). Os itens são
+    indexados por área decrescente e o item i só pode ir para os
+    containers 0..i.
+
+    `backend` escolhe o resolvedor: "gurobi", "highs" (mesma formulação
+    MIP) ou "cpsat" (OR-Tools, NoOverlap2D). O pacote de cada um só é
+    importado quando ele é usado. `threads` = 0 deixa o resolvedor decidir
+    (no CP-SAT, `threads_padrao()`).
+    """
+    if backend not in BACKENDS_PLI:
+        raise ValueError(f"Backend desconhecido: {backend}. Use um de {list(BACKENDS_PLI)}")
+    
+    result = {
+        "Instancia": instance_name,
+        "Status": "Erro_Carregamento",
+        "Bins_Usados": "N/A",
+        "Lower_Bound": "N/A",
+        "Bins_Heuristica": "N/A",
+        "Tempo_Construcao(s)": "N/A",
+        "Memoria_Construcao(MB)": "N/A",
+        "Memoria_Gurobi(MB)": "N/A",
+        "Tempo(s)": 0.0
+    }
+    
+    try:
+        l_container, a_container, max_containers, itens = carregar_instancia_json(instance_name)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{instance_name}' não encontrado.")
+        result["Status"] = "Erro_Arquivo_Nao_Encontrado"
+        return result
+    except Exception as e:
+        print(f"Erro ao carregar instância: {e}")
+        return result
+
+    # Um item maior que o container torna a instância inviável; as heurísticas
+    # nem chegam a ser chamadas (o HFF não termina com um item alto demais).
+    if not itens_cabem(l_container, a_container, itens):
+        print(f"Instância {instance_name} inviável: há itens maiores que o container.")
+        result["Status"] = "Inviavel"
+        return result
+
+    try:
+        if solucao_inicial is None:
+            solucao_inicial = solucao_heuristica(l_container, a_container, max_containers, itens)
+
+        # Itens grandes primeiro: com "item i só nos containers <= i", são eles
+        # que ficam presos aos primeiros containers.
+        itens = sorted(itens, key=lambda item: item.largura * item.altura, reverse=True)
+        n = len(itens)
+        m_bins = len(solucao_inicial) if solucao_inicial else n
+        result["Bins_Heuristica"] = m_bins if solucao_inicial else "N/A"
+        inicial = None
+        if solucao_inicial:
+            inicial = valores_iniciais(solucao_inicial, {item.id: i for i, item in enumerate(itens)})
+
+        print(f"\nIniciando {backend} para instância: {instance_name}")
+        print(f"Itens: {n}, Bins disponíveis (m): {m_bins}, Dimensões: {l_container}x{a_container}")
+
+        BACKENDS_PLI[backend](itens, l_container, a_container, m_bins, inicial, time_limit, threads, result)
+
         # Impressão no console (mantida)
         print(f"\n--- Solução Encontrada (Status: {result['Status']}) ---")
         print(f"Tempo de execução: {result['Tempo(s)']}s")
-        if m.SolCount > 0:
+        if result["Bins_Usados"] != "N/A":
             print(f"Total de containers (ObjVal): {result['Bins_Usados']}")
             print(f"Lower Bound (ObjBound): {result['Lower_Bound']}")
 
-    except gp.GurobiError as e:
-        print(f"Erro do Gurobi: {e.errno}: {e}")
-        result["Status"] = f"Erro_Gurobi_{e.errno}"
+    except ImportError as e:
+        print(f"Backend '{backend}' indisponível: {e}")
+        result["Status"] = "Erro_Backend_Indisponivel"
     except Exception as e:
         print(f"Erro: {e}")
         result["Status"] = f"Erro_Python"
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
         
     return result
 
@@ -140,14 +577,17 @@ if __name__ == "__main__":
         "in/896.json", "in/897.json", "in/898.json", "in/899.json", "in/900.json"
     ]
     
-    ARQUIVO_CSV_PLI = "results/resultados_pli.csv"
-    CABECALHO_CSV = ["Instancia", "Status", "Bins_Usados", "Lower_Bound", "Tempo(s)"]
+    # "gurobi", "highs" ou "cpsat"; só o Gurobi precisa de licença.
+    BACKEND = "gurobi"
+    ARQUIVO_CSV_PLI = "results/resultados_pli.csv" if BACKEND == "gurobi" else f"results/resultados_pli_{BACKEND}.csv"
+    CABECALHO_CSV = ["Instancia", "Status", "Bins_Usados", "Lower_Bound", "Bins_Heuristica",
+                     "Tempo_Construcao(s)", "Memoria_Construcao(MB)", "Memoria_Gurobi(MB)", "Tempo(s)"]
     
     LIMITE_TEMPO = 600 
 
     inicializar_csv(ARQUIVO_CSV_PLI, CABECALHO_CSV)
     for instancia in instance_list:
-        resultado = resolver_pli(instancia, time_limit=LIMITE_TEMPO)
+        resultado = resolver_pli(instancia, time_limit=LIMITE_TEMPO, backend=BACKEND)
         
         # Salva a linha no CSV
         salvar_linha_csv(ARQUIVO_CSV_PLI, resultado, CABECALHO_CSV)
@@ -23,7 +23,8 @@ def consolidar_resultados(arq_lb, arq_heur, arq_pli, arq_grasp, arq_saida, metri
                 for row in reader:
                     instancia = row['Instancia']
                     resultados[instancia] = {}
-                    resultados[instancia]['Limite teórico'] = row['Lower_Bound_Area(L1)']
+                    # CSVs antigos só têm o limite de área
+                    resultados[instancia]['Limite teórico'] = row.get('Lower_Bound_MV(L2)') or row['Lower_Bound_Area(L1)']
         except FileNotFoundError:
             print(f"Aviso: Arquivo '{arq_lb}' não encontrado. Coluna 'Limite teórico' ficará vazia.")
 
@@ -72,6 +73,8 @@ def consolidar_resultados(arq_lb, arq_heur, arq_pli, arq_grasp, arq_saida, metri
                 instancia = row['Instancia']
                 construcao = row['Construcao']
                 busca = row['Busca']
+                # CSVs antigos não têm a semente e guardam uma execução por método.
+                semente = row.get('Seed', '')
 
                 if metrica == "bins":
                     metricas = row['Bins']
@@ -79,22 +82,23 @@ def consolidar_resultados(arq_lb, arq_heur, arq_pli, arq_grasp, arq_saida, metri
                     metricas = row['Tempo(s)']
                 
                 resultados.setdefault(instancia, {})
+                grasp = resultados[instancia].setdefault('GRASP', {}).setdefault(semente, {})
                 
                 if construcao == 'FFF':
                     if busca == 'first_improving':
-                        resultados[instancia]['GRASP_FFF_FI'] = metricas
+                        grasp['GRASP_FFF_FI'] = metricas
                     elif busca == 'best_improving':
-                        resultados[instancia]['GRASP_FFF_BI'] = metricas
-                elif metodo == 'HFF':
+                        grasp['GRASP_FFF_BI'] = metricas
+                elif construcao == 'HFF':
                     if busca == 'first_improving':
-                        resultados[instancia]['GRASP_HFF_FI'] = metricas
+                        grasp['GRASP_HFF_FI'] = metricas
                     elif busca == 'best_improving':
-                        resultados[instancia]['GRASP_HFF_BI'] = metricas
+                        grasp['GRASP_HFF_BI'] = metricas
     except FileNotFoundError:
         print(f"Aviso: Arquivo '{arq_heur}' não encontrado. Colunas 'FFF (first/best imp.)' e 'HFF (first/best imp)' ficarão vazias.")
 
 
-    colunas_saida = ['Instância', 'FFF', 'HFF', 'GRASP_FFF_FI', 'GRASP_HFF_FI', 'GRASP_FFF_BI', 'GRASP_HFF_BI', 'PLI']
+    colunas_saida = ['Instância', 'Seed', 'FFF', 'HFF', 'GRASP_FFF_FI', 'GRASP_HFF_FI', 'GRASP_FFF_BI', 'GRASP_HFF_BI', 'PLI']
     if metrica == "bins":
         colunas_saida.append('Limite teórico')
 
@@ -107,6 +111,10 @@ def consolidar_resultados(arq_lb, arq_heur, arq_pli, arq_grasp, arq_saida, metri
         except ValueError:
             print(f"Aviso: Não foi possível extrair número de '{instancia_str}'.")
             return float('inf') 
+
+    def extrair_semente(item_dicionario):
+        semente = item_dicionario[0]
+        return (0, int(semente)) if semente.lstrip('-').isdigit() else (1, semente)
     
     try:
         with open(arq_saida, mode='w', newline='', encoding='utf-8') as f:
@@ -114,19 +122,22 @@ def consolidar_resultados(arq_lb, arq_heur, arq_pli, arq_grasp, arq_saida, metri
             writer.writeheader()
             
             for instancia, dados in sorted(resultados.items(), key=extrair_numero_instancia):
-                linha_saida = {
-                    'Instância': instancia,
-                    'FFF': dados.get('FFF', 'N/A'),
-                    'HFF': dados.get('HFF', 'N/A'),
-                    'GRASP_FFF_FI': dados.get('GRASP_FFF_FI', 'N/A'),
-                    'GRASP_FFF_BI': dados.get('GRASP_FFF_BI', 'N/A'),
-                    'GRASP_HFF_FI': dados.get('GRASP_HFF_FI', 'N/A'),
-                    'GRASP_HFF_BI': dados.get('GRASP_HFF_BI', 'N/A'),
-                    'PLI': dados.get('PLI', 'N/A'),
-                }
-                if metrica == "bins":
-                    linha_saida['Limite teórico'] = dados.get('Limite teórico', 'N/A')
-                writer.writerow(linha_saida)
+                # Uma linha por semente do GRASP; as colunas determinísticas se repetem.
+                for semente, grasp in sorted(dados.get('GRASP', {'': {}}).items(), key=extrair_semente):
+                    linha_saida = {
+                        'Instância': instancia,
+                        'Seed': semente or 'N/A',
+                        'FFF': dados.get('FFF', 'N/A'),
+                        'HFF': dados.get('HFF', 'N/A'),
+                        'GRASP_FFF_FI': grasp.get('GRASP_FFF_FI', 'N/A'),
+                        'GRASP_FFF_BI': grasp.get('GRASP_FFF_BI', 'N/A'),
+                        'GRASP_HFF_FI': grasp.get('GRASP_HFF_FI', 'N/A'),
+                        'GRASP_HFF_BI': grasp.get('GRASP_HFF_BI', 'N/A'),
+                        'PLI': dados.get('PLI', 'N/A'),
+                    }
+                    if metrica == "bins":
+                        linha_saida['Limite teórico'] = dados.get('Limite teórico', 'N/A')
+                    writer.writerow(linha_saida)
         
         print(f"\nArquivo consolidado '{arq_saida}' gerado com sucesso!")
 
@@ -0,0 +1,108 @@
+import numpy as np
+
+from heuristica_fff import ContainerFFF
+from heuristica_hff import ContainerHFF, Level
+
+class Solucao:
+    """
+    Empacotamento guardado como vetores indexados pelo item (id - 1): o
+    container, o canto inferior esquerdo (x, y), a ordem no container e,
+    no HFF, o level (-1 no FFF). Por container guarda a área ocupada e o
+    número de itens; por level, a altura. Guardar ou enviar a outro processo
+    custa alguns vetores em vez de um objeto por container, level e ponto
+    de inserção; `containers` remonta a lista usada pelas heurísticas.
+
+    É só o formato de armazenamento (elite do GRASP) e de transferência
+    (resultado dos processos paralelos): as construções e a busca local
+    continuam trabalhando sobre ContainerFFF/ContainerHFF.
+    """
+    __slots__ = ("largura", "altura", "hff", "bin", "x", "y", "ordem", "level",
+                 "altura_levels", "area_bins", "itens_bins")
+
+    def __init__(self, largura, altura, hff, bin, x, y, ordem, level, altura_levels, area_bins, itens_bins):
+        self.largura = largura
+        self.altura = altura
+        self.hff = hff
+        self.bin = bin
+        self.x = x
+        self.y = y
+        self.ordem = ordem
+        self.level = level
+        self.altura_levels = altura_levels
+        self.area_bins = area_bins
+        self.itens_bins = itens_bins
+
+    @classmethod
+    def de_containers(cls, containers):
+        """Captura uma lista de containers FFF ou HFF, todos do mesmo tipo."""
+        hff = isinstance(containers[0], ContainerHFF)
+        ids, bins, xs, ys, ordens, levels, altura_levels = [], [], [], [], [], [], []
+        for b, container in enumerate(containers):
+            for k, (item, x, y) in enumerate(container.posicoes()):
+                ids.append(item.id)
+                bins.append(b)
+                xs.append(x)
+                ys.append(y)
+                ordens.append(k)
+            if hff:
+                for level in container.levels:
+                    levels.extend([len(altura_levels)] * len(level.itens))
+                    altura_levels.append(level.altura)
+
+        n = len(ids)
+        indices = np.array(ids, dtype=np.int64) - 1
+        def por_item(valores):
+            vetor = np.full(n, -1, dtype=np.int64)
+            vetor[indices] = valores
+            return vetor
+        return cls(containers[0].largura_max, containers[0].altura_max, hff,
+                   por_item(bins), por_item(xs), por_item(ys), por_item(ordens),
+                   por_item(levels if hff else -1),
+                   np.array(altura_levels, dtype=np.int64),
+                   np.array([c.area_ocupada for c in containers], dtype=np.int64),
+                   np.array([c.num_itens for c in containers], dtype=np.int32))
+
+    def __len__(self):
+        return len(self.area_bins)
+
+    def custo(self):
+        """Mesmo critério de `GRASP._get_custo`: (containers, -soma dos quadrados das ocupações)."""
+        return (len(self), -sum(area * area for area in self.area_bins.tolist()))
+
+    def itens_por_bin(self):
+        """Índices (id - 1) dos itens de cada container, na ordem em que estão nele."""
+        ordenados = np.lexsort((self.ordem, self.bin))
+        return np.split(ordenados, np.cumsum(self.itens_bins)[:-1])
+
+    def montar_container(self, indices, itens, id):
+        """
+        Container com os itens de índices `indices` (os de um container desta
+        solução) nas posições guardadas; `itens` é indexável por id - 1.
+        """
+        indices = indices[np.argsort(self.ordem[indices], kind="stable")]
+        if not self.hff:
+            container = ContainerFFF(id, self.largura, self.altura)
+            for i in indices.tolist():
+                container.adicionar_item(itens[i], int(self.x[i]), int(self.y[i]))
+            return container
+
+        # Levels de baixo para cima e, dentro de cada um, itens da esquerda
+        # para a direita, como em `ContainerHFF.posicoes`.
+        container = ContainerHFF(id, self.largura, self.altura)
+        level_atual, level = None, None
+        for i in indices.tolist():
+            if self.level[i] != level_atual:
+                if level is not None:
+                    container.tentar_adicionar_level(level)
+                level_atual = self.level[i]
+                level = Level(int(self.altura_levels[level_atual]), self.largura)
+            level.tentar_adicionar_item(itens[i])
+        if level is not None:
+            container.tentar_adicionar_level(level)
+        return container
+
+    def containers(self, itens):
+        """Remonta a lista de containers; `itens` é a lista de itens da instância."""
+        por_indice = sorted(itens, key=lambda item: item.id)
+        return [self.montar_container(indices, por_indice, b + 1)
+                for b, indices in enumerate(self.itens_por_bin())]
@@ -47,15 +47,18 @@ if __name__ == "__main__":
             print(f"SEED: {seed}")
             l_c, a_c, max_c, itens = dados_base
 
+            # (construção, busca, alpha reativo)
             estrategias = [
-                ("fff", "first_improving"), ("fff", "best_improving"),
-                ("hff", "first_improving"), ("hff", "best_improving")
+                ("fff", "first_improving", False), ("fff", "best_improving", False),
+                ("hff", "first_improving", False), ("hff", "best_improving", False),
+                ("fff", "first_improving+swap+swap21+ejecao", False), ("fff", "best_improving+swap+swap21+ejecao", False),
+                ("fff", "first_improving", True), ("hff", "best_improving", True)
             ]
 
-            for constr, busca in estrategias:
+            for constr, busca, reativo in estrategias:
                 nome_grasp = f"GRASP({constr.upper()}+{busca.split('_')[0].title()})"
                 
-                grasp = GRASP(ITERACOES_MAX, TEMPO_MAX, constr, busca, ALPHA, seed)
+                grasp = GRASP(ITERACOES_MAX, TEMPO_MAX, constr, busca, ALPHA, seed, alpha_reativo=reativo)
                 melhor_sol, iteracoes, valor_alvo, atingiu_valor_alvo, tempo_ate_alvo = grasp.executar(instance_name, instance_target)
                 
                 tempo_total = time.time() - grasp.tempo_inicio
@@ -63,7 +66,7 @@ if __name__ == "__main__":
                 
                 salvar_linha_csv(ARQ_GRASP, [
                     instance_name, 
-                    constr.upper(), 
+                    constr.upper() + (" REATIVO" if reativo else ""), 
                     busca, 
                     seed,
                     num_bins, 
@@ -0,0 +1,89 @@
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from estrutura import Retangulo
+from pli import indices_modelo, valores_iniciais, vetores_iniciais, solucao_heuristica
+
+
+def instancia_aleatoria(semente, n=14, W=10, H=10):
+    rng = random.Random(semente)
+    itens = [Retangulo(i + 1, rng.randint(1, W // 2 + 1), rng.randint(1, H // 2 + 1)) for i in range(n)]
+    return W, H, itens
+
+def modelo_por_lacos(n, m_bins):
+    """Conjuntos do modelo como eram montados antes da construção vetorizada."""
+    I = range(n)
+    IJ = [(i, j) for i in I for j in range(min(i + 1, m_bins))]
+    PJ = [(i, k, j) for i in I for k in I if i < k for j in range(min(i + 1, m_bins))]
+    return IJ, PJ
+
+def empacotamento(semente):
+    """Itens por área decrescente, como em resolver_pli, e a solução da heurística."""
+    W, H, itens = instancia_aleatoria(semente)
+    solucao = solucao_heuristica(W, H, len(itens), itens)
+    itens = sorted(itens, key=lambda item: item.largura * item.altura, reverse=True)
+    return itens, solucao
+
+
+def test_indices_modelo_igual_aos_lacos():
+    for n in range(1, 9):
+        for m_bins in range(1, n + 2):
+            (ij_i, ij_j), inicio, (pj_i, pj_k, pj_j) = indices_modelo(n, m_bins)
+            IJ, PJ = modelo_por_lacos(n, m_bins)
+            assert list(zip(ij_i.tolist(), ij_j.tolist())) == IJ
+            assert list(zip(pj_i.tolist(), pj_k.tolist(), pj_j.tolist())) == PJ
+            # inicio[i] é a posição do primeiro par (i, 0).
+            assert [IJ.index((i, 0)) for i in range(n)] == inicio.tolist()
+
+def test_valores_iniciais_respeita_quebra_de_simetria():
+    for semente in range(20):
+        itens, solucao = empacotamento(semente)
+        indice_por_id = {item.id: i for i, item in enumerate(itens)}
+        bin_de, posicao_de = valores_iniciais(solucao, indice_por_id)
+
+        assert sorted(bin_de) == list(range(len(itens)))
+        assert set(bin_de.values()) == set(range(len(solucao)))
+        assert all(bin_de[i] <= i for i in range(len(itens)))
+        # Mesmos grupos de itens e mesmas posições da solução de origem.
+        grupos = {frozenset((indice_por_id[item.id], x, y) for item, x, y in container.posicoes())
+                  for container in solucao}
+        por_bin = {}
+        for i, j in bin_de.items():
+            por_bin.setdefault(j, set()).add((i, *posicao_de[i]))
+        assert grupos == {frozenset(g) for g in por_bin.values()}
+
+def test_vetores_iniciais_igual_aos_lacos():
+    for semente in range(20):
+        itens, solucao = empacotamento(semente)
+        n, m_bins = len(itens), len(solucao)
+        w = np.array([item.largura for item in itens])
+        h = np.array([item.altura for item in itens])
+        bin_de, posicao_de = valores_iniciais(solucao, {item.id: i for i, item in enumerate(itens)})
+        y0, x0, px0, py0, relacoes0 = vetores_iniciais(n, m_bins, w, h, indices_modelo(n, m_bins),
+                                                       bin_de, posicao_de)
+
+        IJ, PJ = modelo_por_lacos(n, m_bins)
+        assert y0.tolist() == [1] * m_bins
+        for t, (i, j) in enumerate(IJ):
+            junto = bin_de[i] == j
+            assert x0[t] == (1 if junto else 0)
+            assert px0[t] == (posicao_de[i][0] if junto else 0)
+            assert py0[t] == (posicao_de[i][1] if junto else 0)
+        for t, (i, k, j) in enumerate(PJ):
+            relacao = None
+            if bin_de[i] == j and bin_de[k] == j:
+                (xi, yi), (xk, yk) = posicao_de[i], posicao_de[k]
+                if xi + w[i] <= xk:
+                    relacao = 0
+                elif xk + w[k] <= xi:
+                    relacao = 1
+                elif yi + h[i] <= yk:
+                    relacao = 2
+                else:
+                    relacao = 3
+            assert [r[t] for r in relacoes0] == [1 if r == relacao else 0 for r in range(4)]